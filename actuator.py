@@ -0,0 +1,142 @@
+import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from commands import command_to_dict
+
+
+class Actuator:
+    """
+    Runs mouse actions on one dedicated worker thread, in the order they were
+    submitted, so the Qt thread never sleeps or waits on a pyautogui tween.
+
+    Each action may carry a `delay`, measured from the moment the previous
+    action finished rather than from submission. A click queued right after a
+    grid jump therefore waits for the jump to land and settle, while a click
+    on its own fires immediately.
+
+    Actions submitted inside `with actuator.batch():` are queued as one item
+    and run back to back; if one of them fails, the rest of the batch is
+    dropped rather than clicking somewhere the pointer never reached.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.stopped = threading.Event()
+        self.last_finished = 0.0  # monotonic time the previous action ended
+        self.pending = None  # steps collected by an open batch()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, action, *args, delay=0.0, **kwargs):
+        """
+        Queue `action(*args, **kwargs)` to run at least `delay` seconds after
+        the previously queued action has finished.
+        """
+        step = (action, args, kwargs, delay)
+        if self.pending is not None:
+            self.pending.append(step)
+        else:
+            self.queue.put([step])
+
+    @contextmanager
+    def batch(self):
+        """
+        Collect every submit() in the block and queue them as one unit.
+        Meant for the single thread that feeds the actuator.
+        """
+        if self.pending is not None:
+            yield  # already batching; nested blocks join the outer batch
+            return
+        self.pending = []
+        try:
+            yield
+        finally:
+            steps, self.pending = self.pending, None
+            if steps:
+                self.queue.put(steps)
+
+    def run(self):
+        while not self.stopped.is_set():
+            steps = self.queue.get()
+            if steps is None:
+                break
+            for action, args, kwargs, delay in steps:
+                due = self.last_finished + delay
+                remaining = due - time.monotonic()
+                if remaining > 0 and self.stopped.wait(remaining):
+                    return
+
+                try:
+                    action(*args, **kwargs)
+                    failed = False
+                except Exception as e:
+                    print(f"🖱️ Actuator error in {getattr(action, '__name__', action)}: {e}")
+                    failed = True
+                self.last_finished = time.monotonic()
+                if failed and len(steps) > 1:
+                    print("🖱️ Abandoning the rest of the batch")
+                    break
+
+    def flush(self, timeout=None):
+        """
+        Block until everything queued so far has run.
+        """
+        done = threading.Event()
+        self.submit(done.set)
+        return done.wait(timeout)
+
+    def stop(self):
+        self.stopped.set()
+        self.queue.put(None)
+
+    def dispatch(self, command):
+        """
+        Queue a whole typed command for perform(), for actuators that take
+        commands rather than individual mouse actions. The returned event is
+        set once it has run.
+        """
+        done = threading.Event()
+
+        def act():
+            try:
+                self.perform(command)
+            finally:
+                done.set()
+
+        self.submit(act)
+        return done
+
+    def perform(self, command):
+        raise NotImplementedError
+
+
+class RecordingActuator(Actuator):
+    """
+    Fake that only records which commands ran and when, standing in for
+    pyautogui and the Qt overlay in benchmarks and soak tests.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.actuated = []  # (command, time.perf_counter())
+
+    def perform(self, command):
+        self.actuated.append((command, time.perf_counter()))
+
+
+class JsonActuator(Actuator):
+    """
+    Writes every command as one JSON line to a text stream, so other tools
+    can drive the mouse (or just watch) from the command stream.
+    """
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+
+    def perform(self, command):
+        self.stream.write(json.dumps({"time": round(time.time(), 3), **command_to_dict(command)}) + "\n")
+        self.stream.flush()
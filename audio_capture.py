@@ -0,0 +1,282 @@
+import time
+import wave
+import threading
+import numpy as np
+
+# Audio format shared by every stage downstream of the microphone
+SAMPLE_RATE = 16000
+CHANNELS = 1
+SAMPLE_WIDTH = 2  # bytes per int16 sample
+CHUNK = 1024
+
+
+class RingBuffer:
+    """
+    Fixed-size int16 sample store. Samples are addressed by their absolute
+    index since capture started, so several readers can each keep their own
+    position and pull overlapping windows without copying the whole buffer.
+    """
+
+    def __init__(self, capacity: int, dtype=np.int16, rate=SAMPLE_RATE):
+        self.capacity = capacity
+        self.rate = rate
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.total = 0  # samples written since start
+        self.last_write = time.perf_counter()  # when sample `total` arrived
+        self.closed = False
+        self.cond = threading.Condition()
+
+    @property
+    def oldest(self) -> int:
+        return max(0, self.total - self.capacity)
+
+    def write(self, samples: np.ndarray):
+        n = len(samples)
+        if n == 0:
+            return
+        with self.cond:
+            # Only the newest `capacity` samples can survive the write
+            skipped = max(0, n - self.capacity)
+            samples = samples[skipped:]
+            start = (self.total + skipped) % self.capacity
+            end = start + len(samples)
+            if end <= self.capacity:
+                self.data[start:end] = samples
+            else:
+                split = self.capacity - start
+                self.data[start:] = samples[:split]
+                self.data[:end - self.capacity] = samples[split:]
+            self.total += n
+            self.last_write = time.perf_counter()
+            self.cond.notify_all()
+
+    def read(self, start: int, count: int) -> np.ndarray:
+        """
+        Copy samples [start, start + count) out of the buffer. The range is
+        clipped to what is still held, so the result may be shorter.
+        """
+        with self.cond:
+            end = min(start + count, self.total)
+            start = max(start, self.oldest)
+            if end <= start:
+                return np.zeros(0, dtype=self.data.dtype)
+            a = start % self.capacity
+            b = a + (end - start)
+            if b <= self.capacity:
+                return self.data[a:b].copy()
+            return np.concatenate((self.data[a:], self.data[:b - self.capacity]))
+
+    def time_of(self, index: int) -> float:
+        """
+        Approximate time.perf_counter() at which sample `index` was captured.
+        """
+        with self.cond:
+            return self.last_write - (self.total - index) / self.rate
+
+    def wait_for(self, index: int, timeout=None) -> bool:
+        """
+        Block until sample `index` has been written (exclusive) or the buffer
+        is closed. Returns False on timeout or close.
+        """
+        with self.cond:
+            self.cond.wait_for(lambda: self.total >= index or self.closed, timeout)
+            return self.total >= index
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class CaptureReader:
+    """
+    Independent cursor over a RingBuffer. If the reader falls so far behind
+    that its position has been overwritten, it skips forward to the oldest
+    retained sample instead of failing.
+    """
+
+    def __init__(self, buffer: RingBuffer, cursor: int):
+        self.buffer = buffer
+        self.cursor = cursor
+        self.dropped = 0
+
+    def read(self, count: int, timeout=None):
+        """
+        Return the next `count` samples, or None on timeout/close.
+        """
+        return self.window(count, overlap=0, timeout=timeout)
+
+    def window(self, count: int, overlap: int = 0, timeout=None):
+        """
+        Return `count` samples ending `count - overlap` samples past the
+        cursor, i.e. the window re-includes the last `overlap` samples of the
+        previous one. Advances the cursor by `count - overlap`.
+        """
+        advance = count - overlap
+        if not self.buffer.wait_for(self.cursor + advance, timeout):
+            return None
+        oldest = self.buffer.oldest
+        if self.cursor < oldest:
+            self.dropped += oldest - self.cursor
+            print(f"⚠️ Capture reader fell behind, skipped {oldest - self.cursor} samples")
+            self.cursor = oldest
+        samples = self.buffer.read(self.cursor + advance - count, count)
+        self.cursor += advance
+        return samples
+
+    def seek_latest(self):
+        self.cursor = self.buffer.total
+
+
+class AudioCapture:
+    """
+    Keeps one microphone input stream open for the life of the listener and
+    streams it into a RingBuffer from PyAudio's callback thread.
+    """
+    # Whether the source can wait for a slow pipeline; a microphone can't
+    backpressure = False
+
+    def __init__(self, rate=SAMPLE_RATE, chunk=CHUNK, buffer_seconds=30, device_index=None):
+        self.rate = rate
+        self.chunk = chunk
+        self.device_index = device_index
+        self.buffer = RingBuffer(int(rate * buffer_seconds), rate=rate)
+        self.audio = None
+        self.stream = None
+        self._continue = None
+
+    def start(self):
+        if self.stream is not None:
+            return
+        import pyaudio  # Imported here so the buffer can be used without a device
+
+        self._continue = pyaudio.paContinue
+        self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(format=pyaudio.paInt16, channels=CHANNELS,
+                                      rate=self.rate, input=True,
+                                      frames_per_buffer=self.chunk,
+                                      input_device_index=self.device_index,
+                                      stream_callback=self._on_audio)
+        self.stream.start_stream()
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        self.buffer.write(np.frombuffer(in_data, dtype=np.int16))
+        return None, self._continue
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        if self.audio is not None:
+            self.audio.terminate()
+            self.audio = None
+        self.buffer.close()
+
+    def reader(self, from_start=False) -> CaptureReader:
+        """
+        Create a reader positioned at the live edge (or the oldest retained
+        sample when `from_start` is set).
+        """
+        return CaptureReader(self.buffer, self.buffer.oldest if from_start else self.buffer.total)
+
+
+class StreamCapture:
+    """
+    Drop-in replacement for AudioCapture that feeds the RingBuffer from
+    blocks of int16 samples (a file, a pipe, a socket) instead of a
+    microphone, for running the pipeline without audio hardware.
+
+    Blocks are written at `speed` × real time (0 = as fast as the pipeline
+    keeps up: audio a reader has not reached is never overwritten, and the
+    listener waits for its decoder instead of dropping utterances). Once the
+    blocks run out, a little silence is appended so the last utterance is
+    endpointed, and the buffer is closed. Nothing is written until
+    release() is called, so audio is not spent while the recognizer loads.
+    """
+
+    def __init__(self, blocks, rate=SAMPLE_RATE, buffer_seconds=30, speed=1.0, trailing_silence_s=1.0):
+        self.blocks = blocks
+        self.rate = rate
+        self.speed = speed
+        # As fast as the readers keep up means waiting for the decoder too
+        self.backpressure = not speed
+        self.trailing_silence = np.zeros(int(rate * trailing_silence_s), dtype=np.int16)
+        # Samples arrive at `speed` × real time, which is what time_of()
+        # must use to date them
+        self.buffer = RingBuffer(int(rate * buffer_seconds), rate=rate * speed if speed else float("inf"))
+        self.readers = []
+        self.has_reader = threading.Event()
+        self.released = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.feed, daemon=True)
+            self.thread.start()
+
+    def feed(self):
+        # Nothing is written before someone is reading from the start and
+        # the pipeline is ready to decode it
+        self.has_reader.wait()
+        self.released.wait()
+        started = time.perf_counter()
+        try:
+            for block in self.blocks:
+                if self.buffer.closed:
+                    return
+                for i in range(0, len(block), CHUNK):
+                    self.write(block[i:i + CHUNK], started)
+            self.write(self.trailing_silence, started)
+        except Exception as e:
+            print("🎤 Audio source error:", e)
+        finally:
+            self.buffer.close()
+
+    def write(self, samples, started):
+        if self.speed:
+            due = started + (self.buffer.total + len(samples)) / (self.rate * self.speed)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        else:
+            limit = self.buffer.capacity - len(samples)
+            while (not self.buffer.closed and
+                   any(self.buffer.total - r.cursor > limit for r in self.readers)):
+                time.sleep(0.005)
+        self.buffer.write(samples)
+
+    def release(self):
+        """
+        Let the blocks flow; called once the listener is listening.
+        """
+        self.released.set()
+
+    def stop(self):
+        self.buffer.close()
+        self.released.set()
+
+    def reader(self, from_start=True) -> CaptureReader:
+        """
+        Replayed audio is read from its first sample.
+        """
+        reader = CaptureReader(self.buffer, self.buffer.oldest if from_start else self.buffer.total)
+        self.readers.append(reader)
+        self.has_reader.set()
+        return reader
+
+
+def read_wav(path):
+    """
+    Load a WAV file as mono int16 at SAMPLE_RATE (linear resampling if needed).
+    """
+    with wave.open(path, "rb") as wf:
+        channels, width, rate = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+    if width != 2:
+        raise ValueError(f"{path}: only 16-bit PCM is supported")
+    samples = np.frombuffer(frames, dtype=np.int16).reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return samples.astype(np.int16)
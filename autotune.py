@@ -0,0 +1,226 @@
+"""
+Pick Whisper settings for this machine from measured decode speed.
+
+On first start the tuner times decodes down (or up) a ladder of model size ×
+beam width until one fits the latency budget, picks the faster CPU thread
+count, and stores the result per machine so later starts skip calibration.
+With recognizer_process on, calibration runs in a process of its own so the
+candidate models never load into the GUI's.
+While running it keeps watching decode times and the pipeline backlog and
+steps down the ladder when the machine cannot keep up.
+"""
+import os
+import json
+import time
+import platform
+import multiprocessing
+from collections import deque
+import numpy as np
+
+from audio_capture import SAMPLE_RATE
+from recognizers import WhisperRecognizer
+
+TUNING_PATH = os.environ.get(
+    "VOCAGRID_TUNING",
+    os.path.join(os.path.expanduser("~"), ".vocagrid", "tuning.json")
+)
+
+# (model size, beam width), most accurate first
+LADDER = [
+    ("small", 5),
+    ("small", 2),
+    ("base", 5),
+    ("base", 2),
+    ("base", 1),
+    ("tiny", 2),
+    ("tiny", 1),
+]
+
+# Fastest compute type per device
+COMPUTE_TYPES = {"cpu": "int8", "cuda": "int8_float16"}
+
+# Length of the synthetic calibration utterance, and decodes timed per setting
+CALIBRATION_S = 2.0
+CALIBRATION_RUNS = 2
+
+# Tokens each calibration decode is made to produce, about what a spoken
+# command costs. The encoder sees every clip padded to 30 s, so what differs
+# between real speech and the noise clip is only the decoder's beam work,
+# and on noise Whisper would otherwise stop after a token or two.
+CALIBRATION_TOKENS = 16
+
+# Step down after this many decodes in a row leave audio waiting, or when
+# the p90 of the last RECENT decodes is over budget
+BACKLOG_LIMIT = 3
+RECENT = 10
+
+
+def machine_key(config):
+    """
+    Identifies the host and the settings that change what "fits".
+    """
+    return "|".join([platform.node(), platform.machine(), str(os.cpu_count()),
+                     config["device"], str(config["latency_budget_ms"])])
+
+
+def calibration_clip():
+    """
+    Low-level noise standing in for a short command.
+    """
+    rng = np.random.default_rng(0)
+    return (rng.normal(0, 0.01, int(SAMPLE_RATE * CALIBRATION_S))).astype(np.float32)
+
+
+def calibrate_settings(config, path):
+    """
+    Body of the calibration process: a fresh tuner's calibrate().
+    """
+    return AutoTuner(config, path).calibrate()
+
+
+class AutoTuner:
+    """
+    Chooses and persists whisper_model, beam_size, cpu_threads and
+    compute_type for the configured latency budget. `settings` holds the
+    current choice as config keys.
+    """
+
+    def __init__(self, config, path=TUNING_PATH):
+        self.path = path
+        self.config = dict(config)
+        self.key = machine_key(config)
+        self.device = config["device"]
+        self.budget_s = config["latency_budget_ms"] / 1000
+        self.recent = deque(maxlen=RECENT)
+        self.backlog_run = 0
+
+        self.settings = self.load()
+        self.tuned = self.settings is not None
+        if self.tuned:
+            self.level = LADDER.index((self.settings["whisper_model"], self.settings["beam_size"]))
+            print(f"⚙️ Using tuned settings for this machine: {self.describe()}")
+        else:
+            configured = (config["whisper_model"], config["beam_size"])
+            self.level = LADDER.index(configured) if configured in LADDER else LADDER.index(("base", 5))
+            self.settings = {"whisper_model": LADDER[self.level][0], "beam_size": LADDER[self.level][1],
+                             "cpu_threads": config["cpu_threads"],
+                             "compute_type": COMPUTE_TYPES.get(self.device, config["compute_type"])}
+
+    def describe(self):
+        s = self.settings
+        return f"{s['whisper_model']}/{s['compute_type']}, beam {s['beam_size']}, {s['cpu_threads'] or 'auto'} threads"
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                settings = json.load(f).get(self.key)
+        except (OSError, ValueError):
+            return None
+        if settings and (settings.get("whisper_model"), settings.get("beam_size")) in LADDER:
+            return settings
+        return None
+
+    def save(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        saved[self.key] = dict(self.settings, saved=time.strftime("%Y-%m-%d %H:%M:%S"))
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(saved, f, indent=2)
+        except OSError as e:
+            print(f"⚠️ Could not save tuning to {self.path}: {e}")
+
+    def calibrate(self):
+        """
+        Time decodes of a calibration clip and settle on the most accurate
+        ladder step within budget. Loads each model size it needs once.
+        Returns the chosen settings.
+        """
+        clip = calibration_clip()
+        loaded = {}
+
+        def decode_time(level, threads):
+            model, beam = LADDER[level]
+            key = (model, threads)
+            if key not in loaded:
+                loaded.clear()  # keep one model in memory at a time
+                recognizer = WhisperRecognizer(model, self.settings["compute_type"], self.device, threads)
+                recognizer.load()
+                recognizer.min_tokens = CALIBRATION_TOKENS
+                loaded[key] = recognizer
+            recognizer = loaded[key]
+            recognizer.beam_size = beam
+            times = []
+            for _ in range(CALIBRATION_RUNS):
+                start = time.perf_counter()
+                recognizer.recognize(clip)
+                times.append(time.perf_counter() - start)
+            worst = max(times)
+            print(f"⏱ {model}, beam {beam}, {threads or 'auto'} threads: {worst * 1000:.0f} ms "
+                  f"(RTF {worst / CALIBRATION_S:.2f})")
+            return worst
+
+        print(f"⚙️ Calibrating recognizer for a {self.budget_s * 1000:.0f} ms budget...")
+        cores = os.cpu_count() or 1
+        candidates = sorted({max(1, cores // 2), cores})
+        timed = {threads: decode_time(self.level, threads) for threads in candidates}
+        threads = min(timed, key=timed.get)
+
+        level = self.level
+        if timed[threads] <= self.budget_s:
+            # Headroom: try more accurate steps while they still fit
+            while level > 0 and decode_time(level - 1, threads) <= self.budget_s:
+                level -= 1
+        else:
+            # Too slow: go down until something fits (or nothing lighter is left)
+            while level < len(LADDER) - 1:
+                level += 1
+                if decode_time(level, threads) <= self.budget_s:
+                    break
+
+        self.set_level(level)
+        self.settings["cpu_threads"] = threads
+        self.tuned = True
+        self.save()
+        print(f"✅ Tuned: {self.describe()}")
+        return self.settings
+
+    def calibrate_in_process(self):
+        """
+        calibrate() in a throwaway spawned process, which also saves the
+        result; this one only adopts the chosen settings.
+        """
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(1) as pool:
+            settings = pool.apply(calibrate_settings, (self.config, self.path))
+        self.settings = settings
+        self.set_level(LADDER.index((settings["whisper_model"], settings["beam_size"])))
+        self.tuned = True
+        return self.settings
+
+    def set_level(self, level):
+        self.level = level
+        self.settings["whisper_model"], self.settings["beam_size"] = LADDER[level]
+
+    def observe(self, decode_s, backlog):
+        """
+        Record one live decode and the number of utterances still waiting.
+        Returns new settings when the pipeline should step down, else None.
+        """
+        self.recent.append(decode_s)
+        self.backlog_run = self.backlog_run + 1 if backlog else 0
+        over_budget = len(self.recent) == RECENT and np.percentile(self.recent, 90) > self.budget_s
+        if not (over_budget or self.backlog_run >= BACKLOG_LIMIT) or self.level == len(LADDER) - 1:
+            return None
+
+        reason = "backlog" if self.backlog_run >= BACKLOG_LIMIT else "over budget"
+        self.set_level(self.level + 1)
+        self.recent.clear()
+        self.backlog_run = 0
+        self.save()
+        print(f"📉 Decoding can't keep up ({reason}), switching to {self.describe()}")
+        return self.settings
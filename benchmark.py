@@ -0,0 +1,217 @@
+"""
+Offline replay benchmark for the voice → command path.
+
+Replays a directory of labelled WAV utterances through the same
+record_audio → recognize → best_command path VoiceListener uses, dispatches
+the result to a recording actuator instead of pyautogui/Qt, and prints one
+JSON report (per-stage latency percentiles, real-time factor, command
+accuracy, CPU and memory) that can be diffed across commits. Needs no
+microphone or display.
+
+Labels come from `labels.csv` in the directory (`file,phrase` rows, e.g.
+`b12_01.wav,b twelve`) or, failing that, from the file name up to a double
+underscore (`left click__03.wav`).
+
+    python benchmark.py recordings/ --backend vosk --output bench.json
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import contextlib
+import resource
+import platform
+import subprocess
+import numpy as np
+
+from audio_capture import RingBuffer, CaptureReader, SAMPLE_RATE, read_wav
+from vad import Endpointer
+from actuator import RecordingActuator
+from commands import GRAMMAR
+from matcher import CommandMatcher
+from recognizers import create_recognizer
+from config import load_config, recognizer_options
+from utils import normalize_spoken
+from voice_control import record_audio, recognize, best_command
+from metrics import percentiles
+
+# Silence put before each clip (longer than the endpointer's pre-roll) so
+# its noise floor settles on quiet rather than on trimmed speech, and after
+# it so the endpointer can close the utterance
+LEADING_SILENCE_S = 0.5
+TRAILING_SILENCE_S = 1.0
+
+STAGES = ["endpoint", "decode", "parse", "dispatch", "total"]
+
+
+def load_labels(directory):
+    """
+    [(wav path, spoken phrase)] for every WAV in the directory.
+    """
+    labels = {}
+    label_file = os.path.join(directory, "labels.csv")
+    if os.path.exists(label_file):
+        with open(label_file, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) >= 2 and row[0].lower().endswith(".wav"):
+                    labels[row[0]] = row[1]
+
+    items = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(".wav"):
+            phrase = labels.get(name, os.path.splitext(name)[0].split("__")[0].replace("_", " "))
+            items.append((os.path.join(directory, name), phrase))
+    return items
+
+
+def rss_mb():
+    """
+    Current resident set size in MB (Linux), falling back to the peak.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def endpoint_wait_s(endpointer):
+    """
+    Silence the endpointer needs after speech before it closes an utterance.
+    """
+    return endpointer.end_silence_frames * endpointer.frame / endpointer.rate
+
+
+def replay(path, phrase, recognizer, matcher, actuator):
+    """
+    Push one clip through endpoint → decode → parse → dispatch and return a
+    record with per-stage timings.
+    """
+    samples = read_wav(path)
+    clip = np.concatenate([np.zeros(int(SAMPLE_RATE * LEADING_SILENCE_S), dtype=np.int16), samples,
+                           np.zeros(int(SAMPLE_RATE * TRAILING_SILENCE_S), dtype=np.int16)])
+    buffer = RingBuffer(len(clip))
+    buffer.write(clip)
+    buffer.close()
+
+    expected = GRAMMAR.parse(normalize_spoken(phrase))
+    record = {"file": os.path.basename(path), "phrase": phrase, "expected": repr(expected),
+              "audio_s": round(len(samples) / SAMPLE_RATE, 3)}
+
+    endpointer = Endpointer()
+    t0 = time.perf_counter()
+    audio = record_audio(CaptureReader(buffer, 0), endpointer)
+    t1 = time.perf_counter()
+    # The buffer is pre-filled, so the trailing silence live capture has to
+    # wait for before closing an utterance is added rather than measured
+    endpoint_s = t1 - t0 + endpoint_wait_s(endpointer)
+    if audio is None:
+        record.update(command=None, correct=expected is None, timings={"endpoint": endpoint_s})
+        return record
+
+    hypotheses = recognize(recognizer, audio)
+    t2 = time.perf_counter()
+    command = best_command(hypotheses, matcher)
+    t3 = time.perf_counter()
+
+    timings = {"endpoint": endpoint_s, "decode": t2 - t1, "parse": t3 - t2}
+    if command is not None:
+        actuator.dispatch(command).wait()
+        timings["dispatch"] = actuator.actuated[-1][1] - t3
+    timings["total"] = sum(timings.values())
+
+    record.update(command=repr(command) if command is not None else None, correct=command == expected,
+                  utterance_s=round(len(audio) / SAMPLE_RATE, 3),
+                  hypotheses=[h.text for h in hypotheses], timings=timings)
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay labelled WAVs through the VocaGrid pipeline")
+    parser.add_argument("directory", help="directory of .wav files (+ optional labels.csv)")
+    parser.add_argument("--backend", choices=["whisper", "vosk"], help="override the configured backend")
+    parser.add_argument("--config", help="config.json to use")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the set this many times")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--details", action="store_true", help="include per-utterance records")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config) if args.config else load_config()
+    if args.backend:
+        config["backend"] = args.backend
+    items = load_labels(args.directory)
+    if not items:
+        parser.error(f"no .wav files in {args.directory}")
+
+    # Pipeline logging goes to stderr so stdout carries only the report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(config, items, args.repeat)
+    if not args.details:
+        del report["records"]
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return report
+
+
+def run(config, items, repeat):
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    GRAMMAR.add_macros(config["macros"])
+    recognizer = create_recognizer(config["backend"], phrases=GRAMMAR.spoken_phrases(),
+                                   **recognizer_options(config))
+    recognizer.load()
+    load_s = time.perf_counter() - wall0
+    matcher = CommandMatcher(GRAMMAR, threshold=config["fuzzy_threshold"])
+    actuator = RecordingActuator()
+
+    records = []
+    for _ in range(repeat):
+        for path, phrase in items:
+            records.append(replay(path, phrase, recognizer, matcher, actuator))
+    actuator.stop()
+    cpu_s, wall_s = time.process_time() - cpu0, time.perf_counter() - wall0
+
+    audio_s = sum(r["audio_s"] for r in records)
+    decode_s = sum(r["timings"].get("decode", 0) for r in records)
+    report = {
+        "revision": git_revision(),
+        "host": {"platform": platform.platform(), "cpus": os.cpu_count(), "python": platform.python_version()},
+        "config": config,
+        "utterances": len(records),
+        "accuracy": round(sum(r["correct"] for r in records) / len(records), 4),
+        "missed": sum(r["command"] is None for r in records),
+        "real_time_factor": {
+            "decode": round(decode_s / audio_s, 4) if audio_s else None,
+            "total": round(sum(r["timings"]["total"] for r in records if "total" in r["timings"]) / audio_s, 4)
+            if audio_s else None,
+        },
+        "latency_ms": {stage: percentiles([r["timings"][stage] for r in records if stage in r["timings"]])
+                       for stage in STAGES},
+        # Included in latency_ms.endpoint (and total)
+        "endpoint_silence_wait_ms": round(endpoint_wait_s(Endpointer()) * 1000, 1),
+        "model_load_s": round(load_s, 3),
+        "cpu": {"process_s": round(cpu_s, 3), "wall_s": round(wall_s, 3),
+                "utilisation": round(cpu_s / wall_s, 3) if wall_s else None},
+        "memory_mb": {"rss": round(rss_mb(), 1),
+                      "peak": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)},
+        "records": records,
+    }
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
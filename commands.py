@@ -0,0 +1,321 @@
+import re
+from dataclasses import dataclass, fields
+
+from utils import number_to_words, phonetic_map, normalize_spoken
+
+# Grid size the overlay draws and the grammar accepts (a1–z30)
+GRID_COLUMNS = 26
+GRID_ROWS = 30
+
+# Distance used when a move phrase has no amount
+DEFAULT_MOVE = 50
+
+# Longest single command in words ("move down right 500 pixels")
+MAX_PHRASE_WORDS = 5
+
+
+# 🧾 Typed commands produced by the grammar
+
+@dataclass(frozen=True)
+class GridJump:
+    col: str  # lower-case letter
+    row: int  # 1-based
+    zoom: bool = False  # also open a sub-grid inside the cell
+
+
+@dataclass(frozen=True)
+class MoveBy:
+    dx: int
+    dy: int
+
+
+@dataclass(frozen=True)
+class Click:
+    action: str  # "left_click", "right_click" or "double_click"
+
+
+@dataclass(frozen=True)
+class SetTheme:
+    name: str
+
+
+@dataclass(frozen=True)
+class Scroll:
+    clicks: int  # positive scrolls up
+
+
+@dataclass(frozen=True)
+class HoldDrag:
+    pass
+
+
+@dataclass(frozen=True)
+class ReleaseDrag:
+    pass
+
+
+@dataclass(frozen=True)
+class TogglePanel:
+    pass
+
+
+@dataclass(frozen=True)
+class FocusScreen:
+    number: int  # 1-based, in Qt's screen order
+
+
+@dataclass(frozen=True)
+class SetZoomMode:
+    enabled: bool  # while on, every grid jump opens a sub-grid
+
+
+@dataclass(frozen=True)
+class ZoomOut:
+    pass
+
+
+@dataclass(frozen=True)
+class Glide:
+    dx: int  # direction only: -1, 0 or 1 on each axis
+    dy: int
+
+
+@dataclass(frozen=True)
+class ChangeSpeed:
+    factor: float  # applied to the glide speed
+
+
+@dataclass(frozen=True)
+class StopGlide:
+    pass
+
+
+@dataclass(frozen=True)
+class Sequence:
+    commands: tuple  # run in order, as one batch ("b 12 double click", macros)
+
+
+def command_to_dict(command):
+    """
+    JSON-ready form of a command: its type name plus its fields, with the
+    steps of a Sequence converted the same way.
+    """
+    if isinstance(command, Sequence):
+        return {"type": "Sequence", "commands": [command_to_dict(c) for c in command.commands]}
+    return {"type": type(command).__name__, **{f.name: getattr(command, f.name) for f in fields(command)}}
+
+
+# 🗣 Fixed phrases → commands
+
+click_commands = {
+    "left click": Click("left_click"),
+    "right click": Click("right_click"),
+    "double click": Click("double_click")
+}
+
+theme_commands = {
+    "default theme": SetTheme("default"),
+    "high contrast": SetTheme("high_contrast"),
+    "blue light": SetTheme("blue_light")
+}
+
+mouse_actions = {
+    "scroll up": Scroll(5),
+    "scroll down": Scroll(-5),
+    "start drag": HoldDrag(),
+    "drop here": ReleaseDrag()
+}
+
+drag_commands = {
+    "hold drag": HoldDrag(),
+    "hold and drag": HoldDrag(),
+    "hold to drag": HoldDrag(),
+    "release": ReleaseDrag(),
+    "release drag": ReleaseDrag()
+}
+
+panel_commands = {
+    "toggle panel": TogglePanel()
+}
+
+zoom_commands = {
+    "zoom on": SetZoomMode(True),
+    "zoom mode": SetZoomMode(True),
+    "zoom off": SetZoomMode(False),
+    "exit zoom": SetZoomMode(False),
+    "zoom out": ZoomOut()
+}
+
+screen_commands = {f"screen {n}": FocusScreen(n) for n in range(1, 5)}
+
+# Continuous pointer motion
+GLIDE_SPEED_STEP = 1.6
+
+motion_commands = {
+    "go up": Glide(0, -1),
+    "go down": Glide(0, 1),
+    "go left": Glide(-1, 0),
+    "go right": Glide(1, 0),
+    "go up left": Glide(-1, -1),
+    "go up right": Glide(1, -1),
+    "go down left": Glide(-1, 1),
+    "go down right": Glide(1, 1),
+    "faster": ChangeSpeed(GLIDE_SPEED_STEP),
+    "slower": ChangeSpeed(1 / GLIDE_SPEED_STEP),
+    "stop": StopGlide()
+}
+
+# Relative move distances offered to closed-grammar recognizers
+MOVE_AMOUNTS = list(range(5, 101, 5)) + list(range(150, 501, 50))
+MOVE_DIRECTIONS = ["up", "down", "left", "right", "up left", "up right", "down left", "down right"]
+
+# Marks a prefix whose completions disagree on the command
+AMBIGUOUS = object()
+
+MOVE_PATTERN = re.compile(r"^move(?: (up|down))?(?:[ -]?(left|right))?(?: (\d+))?(?: pixels?)?$")
+
+
+class CommandGrammar:
+    """
+    Every VocaGrid phrase compiled once into a single lookup table plus one
+    regular expression for relative moves. parse() is a dict hit for fixed
+    phrases and grid cells, and a single regex match otherwise.
+    """
+
+    def __init__(self, columns=GRID_COLUMNS, rows=GRID_ROWS):
+        self.columns = columns
+        self.rows = rows
+        self.phrases = {}
+        # Spoken prefix → the one command all its longer phrases mean, built
+        # on first use by early_command()
+        self.completions = None
+        for table in (panel_commands, theme_commands, click_commands, mouse_actions, drag_commands,
+                      zoom_commands, screen_commands, motion_commands):
+            self.phrases.update(table)
+
+        for letter in self.letters():
+            for row in range(1, rows + 1):
+                jump = GridJump(letter, row)
+                zoom = GridJump(letter, row, zoom=True)
+                self.phrases[f"{letter}{row}"] = jump
+                self.phrases[f"{letter} {row}"] = jump
+                self.phrases[f"zoom {letter}{row}"] = zoom
+                self.phrases[f"zoom {letter} {row}"] = zoom
+
+    def letters(self):
+        return [chr(c) for c in range(ord("a"), ord("a") + self.columns)]
+
+    def add_macros(self, macros):
+        """
+        Register named macros, {"save file": ["a 1", "left click"]}. Each step
+        is parsed now, so saying the name later is a single dict hit that
+        yields the whole precompiled Sequence.
+        """
+        for name, steps in macros.items():
+            commands = []
+            for step in steps:
+                command = self.parse(normalize_spoken(step))
+                if command is None:
+                    print(f"⚠️ Macro '{name}': '{step}' is not a command, macro skipped")
+                    break
+                commands.extend(command.commands if isinstance(command, Sequence) else [command])
+            else:
+                self.phrases[normalize_spoken(name)] = Sequence(tuple(commands))
+        self.completions = None
+
+    def parse(self, text):
+        """
+        Map normalized recognizer text ("b 12", "move up right 30") to a
+        command, or None if it is not one. Text made of several commands
+        ("b 12 double click") comes back as a Sequence.
+        """
+        command = self.parse_one(text)
+        if command is not None:
+            return command
+        return self.parse_sequence(text)
+
+    def parse_sequence(self, text):
+        """
+        Split text into back-to-back commands, taking the longest phrase that
+        parses at each position. Returns None unless every word is used.
+        """
+        words = text.split()
+        commands = []
+        start = 0
+        while start < len(words):
+            for end in range(min(len(words), start + MAX_PHRASE_WORDS), start, -1):
+                command = self.parse_one(" ".join(words[start:end]))
+                if command is not None:
+                    commands.extend(command.commands if isinstance(command, Sequence) else [command])
+                    start = end
+                    break
+            else:
+                return None
+        return Sequence(tuple(commands)) if len(commands) > 1 else None
+
+    def parse_one(self, text):
+        """
+        A single phrase: one dict hit, or one move regex match.
+        """
+        command = self.phrases.get(text)
+        if command is not None:
+            return command
+
+        match = MOVE_PATTERN.match(text)
+        if match:
+            vertical, horizontal, amount = match.groups()
+            if not (vertical or horizontal):
+                return None
+            amount = int(amount) if amount else DEFAULT_MOVE
+            dx = {"left": -amount, "right": amount}.get(horizontal, 0)
+            dy = {"up": -amount, "down": amount}.get(vertical, 0)
+            return MoveBy(dx, dy)
+        return None
+
+    def early_command(self, spoken):
+        """
+        Command for a partial transcript in spoken words ("left click",
+        "b twelve") if it is already a complete phrase and every longer
+        phrase starting with it means the same command; None while more
+        words could still change the meaning ("b twenty" → "b twenty five").
+        """
+        if self.completions is None:
+            completions = {}
+            for phrase in self.spoken_phrases():
+                command = self.parse_one(normalize_spoken(phrase))
+                words = phrase.split()
+                for n in range(1, len(words)):
+                    prefix = " ".join(words[:n])
+                    if completions.setdefault(prefix, command) != command:
+                        completions[prefix] = AMBIGUOUS
+            self.completions = completions
+
+        command = self.parse_one(normalize_spoken(spoken))
+        if command is None:
+            return None
+        longer = self.completions.get(spoken)
+        return command if longer is None or longer == command else None
+
+    def spoken_phrases(self):
+        """
+        Every phrase spelled the way it is spoken, for closed-grammar
+        recognizers such as Vosk.
+        """
+        phrases = [p for p, command in self.phrases.items()
+                   if not isinstance(command, (GridJump, FocusScreen))
+                   and not (isinstance(command, Sequence) and any(c.isdigit() for c in p))]
+        phrases += [f"screen {number_to_words(c.number)}" for c in screen_commands.values()]
+
+        letters = self.letters() + [w for w, l in phonetic_map.items() if l in self.letters()]
+        rows = [number_to_words(r) for r in range(1, self.rows + 1)]
+        phrases += [f"{prefix}{letter} {row}" for prefix in ("", "zoom ")
+                    for letter in letters for row in rows]
+
+        for direction in MOVE_DIRECTIONS:
+            phrases.append(f"move {direction}")
+            phrases += [f"move {direction} {number_to_words(a)}" for a in MOVE_AMOUNTS]
+        return phrases
+
+
+# Shared, compiled once at import
+GRAMMAR = CommandGrammar()
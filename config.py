@@ -0,0 +1,66 @@
+import os
+import json
+
+CONFIG_PATH = os.environ.get(
+    "VOCAGRID_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+)
+
+# Defaults for every setting; config.json only needs the keys it changes
+DEFAULTS = {
+    "backend": "whisper",        # "whisper" or "vosk"
+    "whisper_model": "base",     # tiny / base / small / ...
+    "compute_type": "int8",
+    "device": "cpu",
+    "cpu_threads": 0,            # 0 lets CTranslate2 pick
+    "vosk_model_path": None,     # None uses the bundled small English model
+    "beam_size": 5,              # Whisper beam width
+    "n_best": 5,                 # hypotheses kept per utterance (Whisper: at most beam_size)
+    "auto_tune": False,          # pick Whisper model/beam/threads from measured speed
+    "latency_budget_ms": 1000,   # decode time per utterance auto_tune aims for
+    "recognizer_process": False, # decode in a separate worker process
+    "fuzzy_threshold": 85,       # 0-100; near-misses below this are rejected
+    "trace_path": None,          # JSONL file that gets one latency trace per utterance
+    "record_dir": None,          # directory every captured utterance is saved to as WAV
+    "early_dispatch": False,     # act on stable partial results (streaming backends: vosk)
+    "partial_stable_ms": 150,    # how long a partial must hold before it can fire
+    "stop_spotter": True,        # Vosk keyword spotter for "stop" while gliding
+    "idle_mode": False,          # go idle after idle_timeout_s without a command...
+    "idle_timeout_s": 120,
+    "wake_phrase": "wake up",    # ...until this is heard (words in the Vosk model)
+    "macros": {},                # spoken name → list of command phrases, e.g.
+                                 # {"save file": ["a 1", "left click"]}
+}
+
+
+def load_config(path=CONFIG_PATH):
+    """
+    Return the defaults overlaid with whatever config.json provides.
+    """
+    config = dict(DEFAULTS)
+    if path and os.path.exists(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                config.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read config {path}: {e}")
+    return config
+
+
+def recognizer_options(config):
+    """
+    Keyword arguments for the configured recognizer backend.
+    """
+    if config["backend"] == "vosk":
+        options = {"n_best": config["n_best"]}
+        if config["vosk_model_path"]:
+            options["model_path"] = config["vosk_model_path"]
+        return options
+    return {
+        "beam_size": config["beam_size"],
+        "n_best": config["n_best"],
+        "model_size": config["whisper_model"],
+        "compute_type": config["compute_type"],
+        "device": config["device"],
+        "cpu_threads": config["cpu_threads"],
+    }
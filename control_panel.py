@@ -2,6 +2,24 @@ from PyQt6.QtWidgets import QWidget, QPushButton, QVBoxLayout, QLabel, QHBoxLayo
 from PyQt6.QtCore import Qt, QPoint, pyqtSignal
 from PyQt6.QtGui import QIcon, QPixmap
 
+# Latency stages shown in the stats section, with their labels
+STATS_STAGES = [
+    ("decode_wait", "wait"),
+    ("decode", "decode"),
+    ("gui_queue", "queue"),
+    ("actuate", "act"),
+    ("total", "total"),
+]
+
+# Mic icon colour per listener state
+MIC_COLORS = {
+    "loading": Qt.GlobalColor.yellow,
+    "listening": Qt.GlobalColor.green,
+    "idle": Qt.GlobalColor.gray,
+    "error": Qt.GlobalColor.red,
+    "off": Qt.GlobalColor.red,
+}
+
 class ControlPanel(QWidget):
     toggle_requested = pyqtSignal()
 
@@ -9,8 +27,9 @@ class ControlPanel(QWidget):
         super().__init__()
         self.theme_callback = theme_callback
         self.drag_position = None
-        self.mic_status = True  # Assume always listening for now
+        self.mic_status = "loading"  # Recognizer loads in the background
         self.mic_icon = QLabel()
+        self.stats_label = QLabel()
         self.initUI()
 
     def initUI(self):
@@ -21,7 +40,7 @@ class ControlPanel(QWidget):
             Qt.WindowType.Tool
         )
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
-        self.setFixedSize(220, 240)
+        self.setFixedSize(220, 340)
         self.setStyleSheet("background-color: #222; color: white; border: 1px solid #555;")
 
         layout = QVBoxLayout()
@@ -34,7 +53,7 @@ class ControlPanel(QWidget):
         title_label.setStyleSheet("font-weight: bold;")
         title_bar.addWidget(title_label)
 
-        self.update_mic_icon()
+        self.update_mic_icon(self.mic_status)
         title_bar.addWidget(self.mic_icon)
 
         minimize_btn = QPushButton("–")
@@ -56,6 +75,11 @@ class ControlPanel(QWidget):
             btn.clicked.connect(lambda _, cmd=command: self.theme_callback(cmd))
             layout.addWidget(btn)
 
+        # Compact latency stats, refreshed whenever a command completes
+        self.stats_label.setStyleSheet("font-family: monospace; font-size: 10px; border: none;")
+        self.update_stats(None)
+        layout.addWidget(self.stats_label)
+
         self.setLayout(layout)
         self.move(50, 50)
         self.show()
@@ -73,8 +97,27 @@ class ControlPanel(QWidget):
     def toggle_visibility(self):
         self.setVisible(not self.isVisible())
 
-    def update_mic_icon(self, active=True):
-        self.mic_status = active
+    def update_mic_icon(self, state="listening"):
+        # Older callers pass a plain on/off flag
+        if isinstance(state, bool):
+            state = "listening" if state else "off"
+        self.mic_status = state
         pixmap = QPixmap(16, 16)
-        pixmap.fill(Qt.GlobalColor.green if self.mic_status else Qt.GlobalColor.red)
+        pixmap.fill(MIC_COLORS.get(state, Qt.GlobalColor.red))
         self.mic_icon.setPixmap(pixmap)
+        self.mic_icon.setToolTip(f"Microphone: {state}")
+
+    def update_stats(self, summary):
+        """
+        Show p50/p90 per pipeline stage from Metrics.summary().
+        """
+        if not summary or not summary["stages"]:
+            self.stats_label.setText("⏱ No commands yet")
+            return
+        lines = ["⏱ ms      p50    p90"]
+        for stage, label in STATS_STAGES:
+            stats = summary["stages"].get(stage)
+            if stats:
+                lines.append(f"{label:<7}{stats['p50']:>6.0f} {stats['p90']:>6.0f}")
+        lines.append(f"cmds {summary['commands']}  rejected {summary['rejected']}")
+        self.stats_label.setText("\n".join(lines))
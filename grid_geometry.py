@@ -0,0 +1,29 @@
+# Pure cell geometry shared by the overlay (drawing) and mouse_control
+# (targeting), so what is drawn and where the cursor lands always agree.
+# A region is (left, top, width, height) in screen/widget pixels.
+
+
+def cell_bounds(col_index, row_index, region, columns, rows):
+    """
+    (left, top, width, height) of a cell inside `region`, 0-based indices.
+    """
+    left, top, width, height = region
+    cell_width = width / columns
+    cell_height = height / rows
+    return (left + col_index * cell_width, top + row_index * cell_height, cell_width, cell_height)
+
+
+def cell_center(col_index, row_index, region, columns, rows):
+    x, y, w, h = cell_bounds(col_index, row_index, region, columns, rows)
+    return int(x + w / 2), int(y + h / 2)
+
+
+def cell_index(x, y, region, columns, rows):
+    """
+    0-based (column, row) of the cell containing a point, or None if the
+    point lies outside `region`.
+    """
+    left, top, width, height = region
+    if not (left <= x < left + width and top <= y < top + height):
+        return None
+    return int((x - left) * columns / width), int((y - top) * rows / height)
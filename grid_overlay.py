@@ -1,8 +1,19 @@
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtGui import QPainter, QColor, QFont
-from PyQt6.QtCore import Qt, QRect
+from PyQt6.QtGui import QPainter, QColor, QFont, QPixmap, QPen
+from PyQt6.QtCore import Qt, QRect, QTimer
 import ctypes
 
+from grid_geometry import cell_bounds, cell_index
+
+# How long the "you landed here" highlight stays up
+HIGHLIGHT_MS = 1500
+
+# Sub-grid opened inside a cell in zoom mode, and the smallest sub-cell
+# (in pixels) worth zooming into
+ZOOM_COLUMNS = 5
+ZOOM_ROWS = 5
+MIN_ZOOM_CELL = 6
+
 # 🎨 Theme definitions
 THEMES = {
     "default": {
@@ -33,7 +44,19 @@ class GridOverlay(QWidget):
         super().__init__()
         self.columns = columns
         self.rows = rows
-        self.theme = THEMES.get(theme, THEMES["default"])
+        self.theme_name = theme if theme in THEMES else "default"
+        self.theme = THEMES[self.theme_name]
+        # Offscreen render of the grid, rebuilt only when its key changes
+        self.grid_cache = None
+        self.grid_cache_key = None
+        # Widget-space rectangles of the highlighted cells
+        self.target_rect = None
+        self.candidate_rect = None
+        # Zoomed sub-grid regions (left, top, width, height), innermost last
+        self.zoom_stack = []
+        self.highlight_timer = QTimer(self)
+        self.highlight_timer.setSingleShot(True)
+        self.highlight_timer.timeout.connect(lambda: self.highlight_cell(None))
         self.initUI()
 
     def initUI(self):
@@ -51,17 +74,161 @@ class GridOverlay(QWidget):
         hwnd = int(self.winId())
         set_click_through(hwnd)
 
+    def grid_pixmap(self):
+        """
+        Return the rendered grid for the current theme, size and layout,
+        drawing it offscreen only when one of those has changed.
+        """
+        dpr = self.devicePixelRatioF()
+        key = (self.theme_name, self.width(), self.height(), self.columns, self.rows, dpr)
+        if key != self.grid_cache_key:
+            pixmap = QPixmap(round(self.width() * dpr), round(self.height() * dpr))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            self.render_grid(painter, self.width(), self.height())
+            painter.end()
+            self.grid_cache = pixmap
+            self.grid_cache_key = key
+        return self.grid_cache
+
     def paintEvent(self, event):
-        screen_width = self.width()
-        screen_height = self.height()
+        # The painter is clipped to the exposed region, so this only
+        # composites what actually needs repainting
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.grid_pixmap())
+
+        dirty = event.rect()
+        if self.zoom_stack and dirty.intersects(self.region_rect(self.zoom_stack[-1])):
+            self.render_zoom(painter, self.zoom_stack[-1])
+
+        color = QColor(self.theme["font_color"])
+        if self.candidate_rect and dirty.intersects(self.candidate_rect):
+            painter.setPen(QPen(color, 2, Qt.PenStyle.DashLine))
+            painter.drawRect(self.candidate_rect.adjusted(1, 1, -1, -1))
+        if self.target_rect and dirty.intersects(self.target_rect):
+            color.setAlpha(70)
+            painter.fillRect(self.target_rect, color)
+            color.setAlpha(255)
+            painter.setPen(QPen(color, 3))
+            painter.drawRect(self.target_rect.adjusted(1, 1, -2, -2))
+        painter.end()
+
+    def level(self):
+        """
+        Region and shape of the grid that cell names currently refer to:
+        the full screen, or the innermost zoomed sub-grid.
+        """
+        if self.zoom_stack:
+            return self.zoom_stack[-1], ZOOM_COLUMNS, ZOOM_ROWS
+        return (0, 0, self.width(), self.height()), self.columns, self.rows
+
+    def region_rect(self, region):
+        """
+        Widget-space QRect covering a region, using the same rounding as the
+        grid lines so highlights sit exactly inside them.
+        """
+        left, top, width, height = region
+        x, y = int(left), int(top)
+        return QRect(x, y, int(left + width) - x + 1, int(top + height) - y + 1)
+
+    def cell_rect(self, col, row):
+        region, columns, rows = self.level()
+        return self.region_rect(cell_bounds(col, row, region, columns, rows))
+
+    def highlight_cell(self, cell):
+        """
+        Mark `cell` (0-based (column, row) in the current level, or None to
+        clear) as the one the last jump landed on. Only the old and new cell
+        are recomposited, and the highlight clears itself after a moment.
+        """
+        old = self.target_rect
+        self.target_rect = self.cell_rect(*cell) if cell else None
+        for rect in (old, self.target_rect):
+            if rect:
+                self.update(rect)
+        if cell:
+            self.highlight_timer.start(HIGHLIGHT_MS)
+
+    def set_candidate_cell(self, cell):
+        """
+        Outline the cell the cursor is over or about to reach (None clears).
+        """
+        rect = self.cell_rect(*cell) if cell else None
+        if rect == self.candidate_rect:
+            return
+        old, self.candidate_rect = self.candidate_rect, rect
+        for r in (old, rect):
+            if r:
+                self.update(r)
+
+    def cell_at(self, point):
+        """
+        0-based (column, row) of the current-level cell under a widget-space
+        point, or None.
+        """
+        region, columns, rows = self.level()
+        return cell_index(point.x(), point.y(), region, columns, rows)
+
+    def zoom_into(self, cell):
+        """
+        Open a sub-grid inside `cell` of the current level. Returns False
+        (and stays put) once cells would be too small to be useful.
+        """
+        region, columns, rows = self.level()
+        bounds = cell_bounds(*cell, region, columns, rows)
+        if min(bounds[2] / ZOOM_COLUMNS, bounds[3] / ZOOM_ROWS) < MIN_ZOOM_CELL:
+            return False
+        self.clear_highlights()
+        if self.zoom_stack:
+            self.update(self.region_rect(self.zoom_stack[-1]))
+        self.zoom_stack.append(bounds)
+        self.update(self.region_rect(bounds))
+        return True
+
+    def zoom_out(self):
+        if self.zoom_stack:
+            self.clear_highlights()
+            self.update(self.region_rect(self.zoom_stack.pop()))
+            if self.zoom_stack:
+                self.update(self.region_rect(self.zoom_stack[-1]))
+
+    def reset_zoom(self):
+        while self.zoom_stack:
+            self.zoom_out()
+
+    def clear_highlights(self):
+        self.highlight_cell(None)
+        self.set_candidate_cell(None)
+
+    def render_zoom(self, painter, region):
+        """
+        Draw a sub-grid over just the zoomed region, labelled like the main
+        grid (A.., 1..) so the same cell names address it.
+        """
+        rect = self.region_rect(region)
+        painter.fillRect(rect, QColor(0, 0, 0, 120))
+        painter.setPen(QPen(self.theme["bold_line"], 2))
+        painter.drawRect(rect.adjusted(0, 0, -1, -1))
+
+        font = QFont(self.theme["font"])
+        font.setPointSize(8)
+        painter.setFont(font)
+        for col in range(ZOOM_COLUMNS):
+            for row in range(ZOOM_ROWS):
+                cell = self.region_rect(cell_bounds(col, row, region, ZOOM_COLUMNS, ZOOM_ROWS))
+                painter.setPen(self.theme["thin_line"])
+                painter.drawRect(cell.adjusted(0, 0, -1, -1))
+                painter.setPen(self.theme["font_color"])
+                painter.drawText(cell, Qt.AlignmentFlag.AlignCenter, f"{chr(65 + col)}{row + 1}")
+
+    def render_grid(self, painter, screen_width, screen_height):
         cell_width = screen_width / self.columns
         cell_height = screen_height / self.rows
 
-        painter = QPainter(self)
-
         # 1. Draw semi-transparent background
         bg_color = QColor(0, 0, 0, self.theme["background_alpha"])
-        painter.fillRect(self.rect(), bg_color)
+        painter.fillRect(QRect(0, 0, screen_width, screen_height), bg_color)
 
         # 2. Setup font and pens
         painter.setFont(self.theme["font"])
@@ -95,7 +262,13 @@ class GridOverlay(QWidget):
                 label = str(row + 1)
                 painter.drawText(QRect(0, y, 30, int(cell_height)), Qt.AlignmentFlag.AlignVCenter, label)
 
-        painter.end()
+    def set_theme(self, name):
+        """
+        Switch theme; the cached grid is re-rendered on the next paint.
+        """
+        self.theme_name = name
+        self.theme = THEMES[name]
+        self.update()
 
 # 🪟 Windows API click-through setup
 def set_click_through(hwnd):
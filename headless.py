@@ -0,0 +1,201 @@
+"""
+Headless command server: the voice → command pipeline without Qt, the
+overlay or a microphone.
+
+Audio comes from a file, a pipe or a local socket (raw 16 kHz mono
+little-endian int16, or a .wav file) and every parsed command goes to a
+pluggable actuator: real pyautogui, a recording fake, or a JSON-lines
+stream that other tools can consume. Pipeline logging goes to stderr; a
+JSON summary (latency percentiles, drops, throughput) is printed there on
+exit.
+
+    python headless.py recordings/session.wav --actuator record --speed 0
+    arecord -f S16_LE -r 16000 -c 1 | python headless.py pipe:- --actuator json
+    python headless.py tcp:127.0.0.1:5599 --actuator pyautogui
+"""
+import os
+import sys
+import json
+import stat
+import time
+import atexit
+import socket
+import argparse
+import contextlib
+import numpy as np
+
+from audio_capture import StreamCapture, read_wav, SAMPLE_RATE, SAMPLE_WIDTH, CHUNK
+from actuator import RecordingActuator, JsonActuator
+from config import load_config
+from voice_control import VoiceListener
+
+
+def file_blocks(path):
+    if path.lower().endswith(".wav"):
+        yield read_wav(path)
+    else:
+        yield np.fromfile(path, dtype=np.int16)
+
+
+def stream_blocks(stream):
+    """
+    int16 blocks from a binary stream of raw samples, until EOF.
+    """
+    while True:
+        data = stream.read(CHUNK * SAMPLE_WIDTH)
+        if not data:
+            return
+        yield np.frombuffer(data[:len(data) - len(data) % SAMPLE_WIDTH], dtype=np.int16)
+
+
+def socket_blocks(server):
+    """
+    Audio from one client connection after another, with a second of
+    silence after each so its last utterance is endpointed.
+    """
+    while True:
+        conn, _ = server.accept()
+        print("🔌 Audio client connected")
+        with conn, conn.makefile("rb") as stream:
+            yield from stream_blocks(stream)
+        print("🔌 Audio client disconnected")
+        yield np.zeros(SAMPLE_RATE, dtype=np.int16)
+
+
+def remove_socket_file(path):
+    """
+    Delete a unix socket file, e.g. one an earlier run left behind (never a
+    regular file that happens to have the name).
+    """
+    with contextlib.suppress(FileNotFoundError):
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+
+
+def open_source(spec):
+    """
+    Sample blocks for a source spec: PATH (.wav or raw), pipe:- (stdin),
+    pipe:PATH (e.g. a FIFO), unix:PATH or tcp:HOST:PORT.
+    """
+    kind, _, target = spec.partition(":")
+    if kind == "pipe":
+        stream = sys.stdin.buffer if target == "-" else open(target, "rb")
+        return stream_blocks(stream)
+    if kind == "unix":
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        remove_socket_file(target)
+        server.bind(target)
+        atexit.register(remove_socket_file, target)
+    elif kind == "tcp":
+        host, _, port = target.rpartition(":")
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host or "127.0.0.1", int(port)))
+    else:
+        return file_blocks(spec[len("file:"):] if kind == "file" else spec)
+    server.listen(1)
+    print(f"🔌 Waiting for audio on {spec}")
+    return socket_blocks(server)
+
+
+def create_actuator(name, output):
+    if name == "json":
+        return JsonActuator(output)
+    if name == "record":
+        return RecordingActuator()
+    from mouse_control import PyAutoGuiActuator  # needs a display
+    return PyAutoGuiActuator()
+
+
+class CommandServer:
+    """
+    Qt-free counterpart of VocaGridApp: commands from the listener go
+    straight to an actuator, and each trace closes once it has run.
+    """
+
+    def __init__(self, actuator, config, capture):
+        self.actuator = actuator
+        self.capture = capture
+        self.voice = VoiceListener(config=config, capture=capture, on_state=self.handle_state,
+                                   on_command=self.handle_command)
+        self.started = None
+
+    def handle_state(self, state):
+        # The listener drops audio queued while its model loads, so the
+        # source only starts once it is listening
+        if state == "listening":
+            self.capture.release()
+        elif state == "error":
+            self.capture.stop()
+
+    def handle_command(self, command, trace):
+        trace.mark("dispatched")
+        self.actuator.dispatch(command)
+        self.actuator.submit(self.finish_trace, trace)
+
+    def finish_trace(self, trace):
+        trace.mark("actuated")
+        self.voice.metrics.record(trace)
+
+    def run(self):
+        """
+        Serve until the source runs out (or Ctrl-C), then drain the actuator.
+        """
+        self.started = time.perf_counter()
+        try:
+            self.voice.listen()
+        except KeyboardInterrupt:
+            print("🛑 Interrupted")
+        self.actuator.flush(timeout=5)
+        self.actuator.stop()
+        self.voice.stop()
+
+    def summary(self):
+        wall_s = time.perf_counter() - self.started
+        audio_s = self.capture.buffer.total / self.capture.rate
+        summary = self.voice.metrics.summary()
+        return {
+            "audio_s": round(audio_s, 3),
+            "wall_s": round(wall_s, 3),
+            "speed": round(audio_s / wall_s, 2) if wall_s else None,
+            "commands": summary["commands"],
+            "rejected": summary["rejected"],
+            "dropped": {
+                "audio_queue": self.voice.audio_queue.dropped,
+                "text_queue": self.voice.text_queue.dropped,
+                "capture_samples": sum(r.dropped for r in self.capture.readers),
+            },
+            "latency_ms": summary["stages"],
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the VocaGrid voice → command pipeline without Qt")
+    parser.add_argument("source", help="PATH (.wav or raw), pipe:- (stdin), pipe:PATH, unix:PATH or tcp:HOST:PORT; "
+                                       "raw audio is 16 kHz mono s16le")
+    parser.add_argument("--actuator", choices=["json", "record", "pyautogui"], default="json",
+                        help="where commands go (default: JSON lines)")
+    parser.add_argument("--output", help="write the JSON command stream here instead of stdout")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="feed audio at this multiple of real time; 0 = as fast as the pipeline reads it")
+    parser.add_argument("--backend", choices=["whisper", "vosk"], help="override the configured backend")
+    parser.add_argument("--config", help="config.json to use")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config) if args.config else load_config()
+    if args.backend:
+        config["backend"] = args.backend
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+
+    # Pipeline logging goes to stderr so stdout can carry the command stream
+    with contextlib.redirect_stdout(sys.stderr):
+        capture = StreamCapture(open_source(args.source), speed=args.speed)
+        server = CommandServer(create_actuator(args.actuator, output), config, capture)
+        server.run()
+        print(json.dumps(server.summary(), indent=2))
+    if args.output:
+        output.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,111 +1,211 @@
 import sys
-import time
 import threading
 import keyboard  # Global hotkey
-import pyautogui  # For mouse movement
 
-from voice_control import VoiceListener, COMMAND_QUEUE
-from mouse_control import move_to_grid_cell, click
+from voice_control import VoiceListener
+from mouse_control import (move_to, click, move_mouse_by, scroll, mouse_down, mouse_up, PointerGlider,
+                           GRID_MOVE_DELAY, CLICK_DELAY)
+from actuator import Actuator
+from spotter import KeywordSpotter
+from commands import (GridJump, MoveBy, Click, SetTheme, Scroll, HoldDrag, ReleaseDrag,
+                      TogglePanel, SetZoomMode, ZoomOut, FocusScreen, Sequence, Glide, ChangeSpeed,
+                      StopGlide, GRID_COLUMNS, GRID_ROWS)
+from grid_geometry import cell_center
+from screen_index import ScreenGridIndex
 from grid_overlay import GridOverlay, THEMES
 from control_panel import ControlPanel
 
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QTimer, Qt
+from PyQt6.QtCore import Qt, QPoint, pyqtSignal
+from PyQt6.QtGui import QCursor, QGuiApplication
 
 # Global panel reference
 panel = None
 
-def move_mouse_by(dx=0, dy=0):
-    pyautogui.moveRel(dx, dy, duration=0.1)
-
 class VocaGridApp(GridOverlay):
-    def __init__(self, theme="default"):
-        self.theme_name = theme
-        super().__init__(columns=26, rows=30, theme=theme)
+    # Emitted from the listener threads; Qt queues them onto the GUI thread
+    mic_state_changed = pyqtSignal(str)
+    command_received = pyqtSignal(object, object)  # command, trace
+    metrics_updated = pyqtSignal()
 
-        self.voice = VoiceListener()
+    def __init__(self, theme="default"):
+        super().__init__(columns=GRID_COLUMNS, rows=GRID_ROWS, theme=theme)
+
+        # Mouse actions run (and wait) on their own thread, never on this one
+        self.actuator = Actuator()
+        # Continuous motion runs on its own timer thread
+        self.glider = PointerGlider(on_change=self.on_glide_change)
+        self.stop_spotter = None
+        # While on, every grid jump opens a sub-grid in the target cell
+        self.zoom_mode = False
+        # Per-screen cell → pointer tables, rebuilt only on screen changes
+        self.grid_index = ScreenGridIndex(self.columns, self.rows)
+        self.grid_index.changed.connect(self.fit_to_screen)
+
+        # Command type → handler; a new command only needs an entry here
+        self.handlers = {
+            Click: self.do_click,
+            SetTheme: self.do_theme,
+            TogglePanel: self.do_toggle_panel,
+            MoveBy: self.do_move,
+            GridJump: self.do_grid_jump,
+            Scroll: self.do_scroll,
+            HoldDrag: self.do_hold_drag,
+            ReleaseDrag: self.do_release_drag,
+            SetZoomMode: self.do_zoom_mode,
+            ZoomOut: self.do_zoom_out,
+            FocusScreen: self.do_focus_screen,
+            Sequence: self.do_sequence,
+            Glide: self.do_glide,
+            ChangeSpeed: self.do_change_speed,
+            StopGlide: self.do_stop_glide,
+        }
+
+        # Commands are pushed into the event loop as soon as they are parsed;
+        # the recognizer loads on the listener's own thread, so the overlay
+        # is up before the model has finished loading
+        self.command_received.connect(self.handle_command)
+        self.voice = VoiceListener(on_state=self.mic_state_changed.emit,
+                                   on_command=self.command_received.emit)
         threading.Thread(target=self.voice.listen, daemon=True).start()
 
-
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_commands)
-        self.timer.start(1000)
-
-    def check_commands(self):
-        global panel
-        while not COMMAND_QUEUE.empty():
-            command = COMMAND_QUEUE.get()
-            print("Heard:", command)
-
-            if command in ["left_click", "right_click", "double_click"]:
-                click(command)
-
-            elif command.startswith("theme_"):
-                new_theme = command.replace("theme_", "")
-                if new_theme in THEMES:
-                    print(f"🎨 Switching theme to: {new_theme}")
-                    self.theme_name = new_theme
-                    self.update_theme()
-                else:
-                    print(f"⚠️ Unknown theme: {new_theme}")
-
-            elif command == "toggle_panel":
-                if panel:
-                    panel.toggle_visibility()
-
-            # 🧲 Diagonal movement: check this before single‐axis moves
-            elif command.startswith("move_") and len(command.split("_")) == 4:
-                _, vertical, horizontal, amount = command.split("_")
-                dx = int(amount) if horizontal == "right" else -int(amount)
-                dy = int(amount) if vertical == "down" else -int(amount)
-                print(f"🧭 Diagonal move: dx={dx}, dy={dy}")
-                move_mouse_by(dx=dx, dy=dy)
-
-            # 🧭 Single‐axis moves
-            elif command.startswith("move_right_"):
-                amount = int(command.split("_")[-1])
-                move_mouse_by(dx=amount, dy=0)
-
-            elif command.startswith("move_left_"):
-                amount = int(command.split("_")[-1])
-                move_mouse_by(dx=-amount, dy=0)
-
-            elif command.startswith("move_up_"):
-                amount = int(command.split("_")[-1])
-                move_mouse_by(dx=0, dy=-amount)
-
-            elif command.startswith("move_down_"):
-                amount = int(command.split("_")[-1])
-                move_mouse_by(dx=0, dy=amount)
-
-            elif command == "hold_drag":
-                print("🖱️ Holding mouse button...")
-                pyautogui.mouseDown()
-
-            elif command == "release_drag":
-                print("🖱️ Releasing mouse button...")
-                pyautogui.mouseUp()
-
+    def handle_command(self, command, trace=None):
+        print("Heard:", command)
+        if trace:
+            trace.mark("dispatched")
+        handler = self.handlers.get(type(command))
+        if handler is None:
+            print(f"⚠️ No handler for command: {command}")
+            return
+        handler(command)
+        if trace:
+            # Runs after every action the handler queued, so the trace
+            # closes when the command has actually reached the mouse
+            self.actuator.submit(self.finish_trace, trace)
+
+    def finish_trace(self, trace):
+        trace.mark("actuated")
+        self.voice.metrics.record(trace)
+        self.metrics_updated.emit()
+
+    def do_sequence(self, command):
+        # Overlay state (zoom level, highlights) updates step by step here,
+        # while the mouse actions are queued to run as one uninterrupted batch
+        with self.actuator.batch():
+            for step in command.commands:
+                self.handlers[type(step)](step)
+
+    def on_glide_change(self, moving):
+        if self.stop_spotter:
+            if moving:
+                self.stop_spotter.resume()
             else:
-                col = command[0].upper()
-                try:
-                    row = int(command[1:])
-                    time.sleep(0.2)
-                    move_to_grid_cell(col, row, self.width(), self.height(), self.columns, self.rows)
-                except ValueError:
-                    print(f"⚠️ Invalid grid reference: {command}")
-
-    def update_theme(self):
-        self.theme = THEMES[self.theme_name]
-        self.repaint()
+                self.stop_spotter.pause()
+
+    def do_glide(self, command):
+        self.set_candidate_cell(None)
+        if self.stop_spotter is None and self.voice.config["stop_spotter"]:
+            # While gliding, "stop" is also caught by a keyword spotter
+            # straight off the microphone, which stops the glider from its
+            # own thread without waiting for the utterance to end or for
+            # this event loop. Built on the first glide, so sessions that
+            # never glide don't pay for its model
+            self.stop_spotter = KeywordSpotter(self.voice.capture, ["stop"], lambda word: self.glider.stop())
+            self.stop_spotter.start()
+        self.glider.go(command.dx, command.dy)
+
+    def do_change_speed(self, command):
+        self.glider.change_speed(command.factor)
+
+    def do_stop_glide(self, command):
+        self.glider.stop()
+
+    def do_click(self, command):
+        self.actuator.submit(click, command.action, delay=CLICK_DELAY)
+        # The target has been reached; next grid command starts from the top
+        self.reset_zoom()
+
+    def do_theme(self, command):
+        if command.name in THEMES:
+            print(f"🎨 Switching theme to: {command.name}")
+            self.set_theme(command.name)
+        else:
+            print(f"⚠️ Unknown theme: {command.name}")
+
+    def do_toggle_panel(self, command):
+        if panel:
+            panel.toggle_visibility()
+
+    def do_move(self, command):
+        self.glider.stop()
+        print(f"🧭 Move: dx={command.dx}, dy={command.dy}")
+        self.actuator.submit(move_mouse_by, dx=command.dx, dy=command.dy)
+        # Outline the cell the cursor is heading for. dx/dy are pointer
+        # pixels and Qt positions are logical, so undo the screen's scale
+        scale = self.grid_index.scale(self.grid_index.screen_number(self.screen()))
+        offset = QPoint(round(command.dx / scale), round(command.dy / scale))
+        landing = self.mapFromGlobal(QCursor.pos() + offset)
+        self.set_candidate_cell(self.cell_at(landing))
+
+    def do_grid_jump(self, command):
+        self.glider.stop()
+        cell = (ord(command.col) - ord("a"), command.row - 1)
+        region, columns, rows = self.level()
+        if cell[0] >= columns or cell[1] >= rows:
+            # Not a sub-grid cell: leave zoom and address the full grid
+            self.reset_zoom()
+            region, columns, rows = self.level()
+
+        # Top-level cells are a table read; sub-grid cells are mapped through
+        # the same per-screen scale
+        screen = self.grid_index.screen_number(self.screen())
+        if self.zoom_stack:
+            x, y = self.grid_index.to_pointer(screen, *cell_center(*cell, region, columns, rows))
+        else:
+            x, y = self.grid_index.point(screen, *cell)
+        self.actuator.submit(move_to, x, y, f"{command.col.upper()}{command.row}", delay=GRID_MOVE_DELAY)
+
+        self.set_candidate_cell(None)
+        if not ((command.zoom or self.zoom_mode) and self.zoom_into(cell)):
+            self.highlight_cell(cell)
+
+    def do_focus_screen(self, command):
+        screens = QGuiApplication.screens()
+        if command.number > len(screens):
+            print(f"⚠️ No screen {command.number} (have {len(screens)})")
+            return
+        self.reset_zoom()
+        self.setScreen(screens[command.number - 1])
+        self.fit_to_screen()
+
+    def fit_to_screen(self):
+        # Called when the screen layout changes; the grid cache follows the size
+        self.reset_zoom()
+        self.setGeometry(self.screen().geometry())
+        self.showFullScreen()
+
+    def do_zoom_mode(self, command):
+        print(f"🔍 Zoom mode {'on' if command.enabled else 'off'}")
+        self.zoom_mode = command.enabled
+        if not command.enabled:
+            self.reset_zoom()
+
+    def do_zoom_out(self, command):
+        self.zoom_out()
+
+    def do_scroll(self, command):
+        self.actuator.submit(scroll, command.clicks)
+
+    def do_hold_drag(self, command):
+        self.actuator.submit(mouse_down)
+
+    def do_release_drag(self, command):
+        self.actuator.submit(mouse_up)
 
 def handle_theme_command(command: str):
     if command.startswith("theme_"):
-        new_theme = command.replace("theme_", "")
-        if new_theme in THEMES:
-            print(f"🎨 (Panel) Switching theme to: {new_theme}")
-            overlay.theme_name = new_theme
-            overlay.update_theme()
+        print("🎨 (Panel) Theme button pressed")
+        overlay.handle_command(SetTheme(command.replace("theme_", "")))
 
 def listen_for_global_shortcut():
     keyboard.add_hotkey('ctrl+alt+p', lambda: panel.toggle_visibility() if panel is not None else None)
@@ -116,6 +216,9 @@ if __name__ == '__main__':
 
     overlay = VocaGridApp(theme="default")
     panel = ControlPanel(theme_callback=handle_theme_command)
+    overlay.mic_state_changed.connect(panel.update_mic_icon)
+    panel.update_mic_icon(overlay.voice.state)
+    overlay.metrics_updated.connect(lambda: panel.update_stats(overlay.voice.metrics.summary()))
 
     threading.Thread(target=listen_for_global_shortcut, daemon=True).start()
 
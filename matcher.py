@@ -0,0 +1,87 @@
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from commands import GridJump, MoveBy, MOVE_AMOUNTS, MOVE_DIRECTIONS, DEFAULT_MOVE
+from utils import phonetic_map, letter_names, number_to_words
+
+# Minimum fuzz.ratio score to accept a near-miss, and how far the winner must
+# stay ahead of the best-scoring *different* command
+DEFAULT_THRESHOLD = 85
+MIN_MARGIN = 3
+
+
+class CommandMatcher:
+    """
+    Fuzzy fallback for text the grammar rejected. Every command is indexed
+    once under all the ways it might come back from a recognizer (digits or
+    number words, letters, phonetic alphabet or letter names), and lookups
+    score a whole batch of texts against that index in one rapidfuzz call.
+    """
+
+    def __init__(self, grammar, threshold=DEFAULT_THRESHOLD, margin=MIN_MARGIN):
+        self.threshold = threshold
+        self.margin = margin
+
+        variants = {}
+        for phrase, command in grammar.phrases.items():
+            if not (isinstance(command, GridJump) and command.zoom):
+                variants.setdefault(phrase, command)
+
+        spoken_letters = {}
+        for word, letter in phonetic_map.items():
+            spoken_letters.setdefault(letter, []).append(word)
+        for letter, name in letter_names.items():
+            spoken_letters.setdefault(letter, []).append(name)
+
+        for letter in grammar.letters():
+            for row in range(1, grammar.rows + 1):
+                jump = GridJump(letter, row)
+                for spoken in [letter] + spoken_letters.get(letter, []):
+                    variants.setdefault(f"{spoken} {row}", jump)
+                    variants.setdefault(f"{spoken} {number_to_words(row)}", jump)
+
+        for direction in MOVE_DIRECTIONS:
+            vertical = direction.split()[0] if direction.split()[0] in ("up", "down") else None
+            horizontal = direction.split()[-1] if direction.split()[-1] in ("left", "right") else None
+            for amount in MOVE_AMOUNTS + [None]:
+                a = amount or DEFAULT_MOVE
+                move = MoveBy({"left": -a, "right": a}.get(horizontal, 0),
+                              {"up": -a, "down": a}.get(vertical, 0))
+                if amount is None:
+                    variants.setdefault(f"move {direction}", move)
+                else:
+                    variants.setdefault(f"move {direction} {amount}", move)
+                    variants.setdefault(f"move {direction} {number_to_words(amount)}", move)
+
+        self.choices = list(variants)
+        self.commands = list(variants.values())
+        # Variants of the same command share an id, for the margin check
+        ids = {}
+        self.command_ids = np.array([ids.setdefault(c, len(ids)) for c in self.commands])
+
+    def match_many(self, texts):
+        """
+        Score every text against the whole index at once. Returns a list of
+        (command, score) per text, with (None, best score) when nothing is
+        confidently close enough.
+        """
+        if not texts:
+            return []
+        scores = process.cdist(texts, self.choices, scorer=fuzz.ratio, dtype=np.uint8)
+        results = []
+        for row in scores:
+            best = int(np.argmax(row))
+            best_score = int(row[best])
+            rivals = row[self.command_ids != self.command_ids[best]]
+            runner_up = int(rivals.max()) if len(rivals) else 0
+            if best_score >= self.threshold and best_score - runner_up >= self.margin:
+                results.append((self.commands[best], best_score))
+            else:
+                results.append((None, best_score))
+        return results
+
+    def match(self, text):
+        """
+        Best confident match for one text, as (command, score).
+        """
+        return self.match_many([text])[0]
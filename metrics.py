@@ -0,0 +1,107 @@
+import json
+import time
+import itertools
+import threading
+from collections import deque
+
+import numpy as np
+
+# Timestamps recorded along one command's path, in order
+SPANS = ["captured", "speech_end", "endpointed", "decode_start", "decode_end",
+         "parsed", "queued", "dispatched", "actuated"]
+
+# Stage name → (from span, to span)
+STAGES = {
+    "endpoint": ("speech_end", "endpointed"),
+    "decode_wait": ("endpointed", "decode_start"),
+    "decode": ("decode_start", "decode_end"),
+    "parse": ("decode_end", "parsed"),
+    "gui_queue": ("queued", "dispatched"),
+    "actuate": ("dispatched", "actuated"),
+    "total": ("speech_end", "actuated"),
+}
+
+
+def percentiles(values):
+    """
+    Summary of a list of durations (seconds) in milliseconds.
+    """
+    if not len(values):
+        return {}
+    ms = np.array(values) * 1000
+    return {
+        "count": len(ms),
+        "mean": round(float(ms.mean()), 2),
+        "p50": round(float(np.percentile(ms, 50)), 2),
+        "p90": round(float(np.percentile(ms, 90)), 2),
+        "p99": round(float(np.percentile(ms, 99)), 2),
+        "max": round(float(ms.max()), 2),
+    }
+
+
+class Trace:
+    """
+    Span timestamps (time.perf_counter) for one utterance, tagged with a
+    correlation id that follows it from the microphone to the mouse.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self):
+        self.id = next(Trace._ids)
+        self.marks = {}
+        self.text = None
+        self.command = None
+
+    def mark(self, span, at=None):
+        self.marks[span] = time.perf_counter() if at is None else at
+
+    def durations(self):
+        return {stage: self.marks[b] - self.marks[a]
+                for stage, (a, b) in STAGES.items() if a in self.marks and b in self.marks}
+
+
+class Metrics:
+    """
+    Rolling per-stage latency histograms over the last `window` traces, with
+    an optional JSONL sink that gets one line per finished trace.
+    """
+
+    def __init__(self, window=200, trace_path=None):
+        self.lock = threading.Lock()
+        self.stages = {stage: deque(maxlen=window) for stage in STAGES}
+        self.commands = 0
+        self.rejected = 0
+        self.sink = open(trace_path, "a", encoding="utf-8", buffering=1) if trace_path else None
+
+    def record(self, trace):
+        durations = trace.durations()
+        with self.lock:
+            for stage, seconds in durations.items():
+                self.stages[stage].append(seconds)
+            if trace.command is None:
+                self.rejected += 1
+            else:
+                self.commands += 1
+            if self.sink:
+                origin = trace.marks.get("captured", min(trace.marks.values(), default=0))
+                self.sink.write(json.dumps({
+                    "id": trace.id,
+                    "text": trace.text,
+                    "command": repr(trace.command) if trace.command is not None else None,
+                    "marks_ms": {s: round((trace.marks[s] - origin) * 1000, 2) for s in SPANS if s in trace.marks},
+                    "stages_ms": {s: round(d * 1000, 2) for s, d in durations.items()},
+                }) + "\n")
+
+    def summary(self):
+        """
+        {stage: percentiles} for every stage with data, plus counters.
+        """
+        with self.lock:
+            snapshot = {stage: list(values) for stage, values in self.stages.items() if values}
+            counts = {"commands": self.commands, "rejected": self.rejected}
+        return {"stages": {stage: percentiles(values) for stage, values in snapshot.items()}, **counts}
+
+    def close(self):
+        if self.sink:
+            self.sink.close()
+            self.sink = None
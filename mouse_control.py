@@ -1,39 +1,55 @@
-import pyautogui
+import math
 import time
+import threading
+import pyautogui
+
+from actuator import Actuator
+from commands import (GridJump, MoveBy, Click, Scroll, HoldDrag, ReleaseDrag, Sequence, Glide, ChangeSpeed,
+                      StopGlide, GRID_COLUMNS, GRID_ROWS)
+from grid_geometry import cell_center
 
 # Disable failsafe in case you move mouse to top-left by accident
 pyautogui.FAILSAFE = False
 
-def move_to_grid_cell(col_letter: str, row_number: int, screen_width: int, screen_height: int, columns=20, rows=20):
+# Settle times, applied by the Actuator after the previous action finishes
+GRID_MOVE_DELAY = 0.2  # Slight buffer to avoid overlay interference
+CLICK_DELAY = 0.3      # Give movement time to finish
+
+# Continuous motion: update rate, starting speed (px/s) and its limits,
+# and how long a glide takes to reach full speed
+GLIDE_HZ = 120
+GLIDE_SPEED = 300
+GLIDE_MIN_SPEED = 40
+GLIDE_MAX_SPEED = 3000
+GLIDE_RAMP_S = 0.15
+
+def move_to_grid_cell(col_letter: str, row_number: int, screen_width: int, screen_height: int, columns=20, rows=20,
+                      left=0, top=0):
     """
     Convert grid cell like 'C9' to screen coordinates and move the mouse.
-    Accepts dynamic grid size (columns x rows).
+    Accepts dynamic grid size (columns x rows) and, for zoomed sub-grids, a
+    region offset (left, top) with size screen_width x screen_height.
     """
     col_index = ord(col_letter.upper()) - 65  # A = 0
     row_index = row_number - 1                # 1 = 0
 
-    cell_width = screen_width / columns
-    cell_height = screen_height / rows
-
-    target_x = int(col_index * cell_width + cell_width / 2)
-    target_y = int(row_index * cell_height + cell_height / 2)
+    region = (left, top, screen_width, screen_height)
+    target_x, target_y = cell_center(col_index, row_index, region, columns, rows)
 
-    print(f"📍 Moving to cell {col_letter.upper()}{row_number}")
-    print(f"→ Grid size: {columns}×{rows}")
-    print(f"→ Screen size: {screen_width}x{screen_height}")
-    print(f"→ Cell size: {round(cell_width)}x{round(cell_height)}")
-    print(f"→ Target pixel: ({target_x}, {target_y})")
+    move_to(target_x, target_y, f"{col_letter.upper()}{row_number}")
 
-    time.sleep(0.2)  # Slight buffer to avoid overlay interference
-    pyautogui.moveTo(target_x, target_y)
+def move_to(x: int, y: int, label=""):
+    """
+    Move the mouse to pointer coordinates, e.g. a precomputed cell centre.
+    """
+    print(f"📍 Moving to {label or 'point'} at ({x}, {y})")
+    pyautogui.moveTo(x, y)
 
 def click(action: str):
     """
     Perform a mouse click based on the action string.
     """
     print(f"🖱️ Executing click action: {action}")
-    time.sleep(0.3)  # Delay to give movement time to finish
-
     if action == "left_click":
         pyautogui.click()
     elif action == "right_click":
@@ -42,3 +58,130 @@ def click(action: str):
         pyautogui.doubleClick()
     else:
         print("❌ Unknown click command.")
+
+def move_mouse_by(dx=0, dy=0):
+    pyautogui.moveRel(dx, dy, duration=0.1)
+
+def scroll(clicks):
+    pyautogui.scroll(clicks)
+
+def mouse_down():
+    print("🖱️ Holding mouse button...")
+    pyautogui.mouseDown()
+
+def mouse_up():
+    print("🖱️ Releasing mouse button...")
+    pyautogui.mouseUp()
+
+
+class PointerGlider:
+    """
+    Moves the pointer continuously in one direction from its own timer
+    thread, GLIDE_HZ times a second, independent of recognition. Speed eases
+    in over GLIDE_RAMP_S and fractional pixels carry over between ticks so
+    motion stays smooth at any speed. go(), change_speed() and stop() are
+    safe to call from any thread; a stop takes effect within one tick.
+
+    `on_change(moving)` is called when gliding starts or stops.
+    """
+
+    def __init__(self, on_change=None):
+        self.on_change = on_change
+        self.speed = GLIDE_SPEED
+        self.direction = (0.0, 0.0)
+        self.lock = threading.Lock()
+        self.moving = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def go(self, dx, dy):
+        length = math.hypot(dx, dy) or 1.0
+        with self.lock:
+            self.direction = (dx / length, dy / length)
+        print(f"🛷 Gliding ({dx}, {dy}) at {self.speed:.0f} px/s")
+        if not self.moving.is_set():
+            self.moving.set()
+            if self.on_change:
+                self.on_change(True)
+
+    def change_speed(self, factor):
+        with self.lock:
+            self.speed = min(max(self.speed * factor, GLIDE_MIN_SPEED), GLIDE_MAX_SPEED)
+        print(f"🛷 Glide speed {self.speed:.0f} px/s")
+
+    def stop(self):
+        if self.moving.is_set():
+            self.moving.clear()
+            print("🛑 Glide stopped")
+            if self.on_change:
+                self.on_change(False)
+
+    def run(self):
+        period = 1.0 / GLIDE_HZ
+        while True:
+            self.moving.wait()
+            velocity = 0.0
+            carry_x = carry_y = 0.0
+            last = time.perf_counter()
+            while self.moving.is_set():
+                time.sleep(period)
+                now = time.perf_counter()
+                dt, last = now - last, now
+                with self.lock:
+                    (ux, uy), target = self.direction, self.speed
+                velocity += (target - velocity) * min(1.0, dt / GLIDE_RAMP_S)
+                carry_x += ux * velocity * dt
+                carry_y += uy * velocity * dt
+                step_x, step_y = int(carry_x), int(carry_y)
+                carry_x -= step_x
+                carry_y -= step_y
+                if (step_x or step_y) and self.moving.is_set():
+                    # _pause=False: skip pyautogui's 0.1 s sleep after each call
+                    pyautogui.moveRel(step_x, step_y, _pause=False)
+
+
+class PyAutoGuiActuator(Actuator):
+    """
+    Performs typed commands with pyautogui and no overlay: grid cells are
+    taken over the whole primary screen, and overlay-only commands (themes,
+    zoom, panel, screen focus) are ignored.
+    """
+
+    def __init__(self, columns=GRID_COLUMNS, rows=GRID_ROWS):
+        super().__init__()
+        self.columns = columns
+        self.rows = rows
+        self.glider = PointerGlider()
+
+    def perform(self, command):
+        steps = command.commands if isinstance(command, Sequence) else (command,)
+        for i, step in enumerate(steps):
+            if i and isinstance(step, (Click, GridJump)):
+                # Let the previous step land, as the overlay's delays do
+                time.sleep(CLICK_DELAY if isinstance(step, Click) else GRID_MOVE_DELAY)
+            self.perform_one(step)
+
+    def perform_one(self, command):
+        if isinstance(command, (GridJump, MoveBy)):
+            self.glider.stop()
+        if isinstance(command, GridJump):
+            width, height = pyautogui.size()
+            move_to_grid_cell(command.col, command.row, width, height, self.columns, self.rows)
+        elif isinstance(command, MoveBy):
+            move_mouse_by(command.dx, command.dy)
+        elif isinstance(command, Click):
+            click(command.action)
+        elif isinstance(command, Scroll):
+            scroll(command.clicks)
+        elif isinstance(command, HoldDrag):
+            mouse_down()
+        elif isinstance(command, ReleaseDrag):
+            mouse_up()
+        elif isinstance(command, Glide):
+            self.glider.go(command.dx, command.dy)
+        elif isinstance(command, ChangeSpeed):
+            self.glider.change_speed(command.factor)
+        elif isinstance(command, StopGlide):
+            self.glider.stop()
+        else:
+            print(f"ℹ️ No overlay, ignoring {command}")
@@ -0,0 +1,99 @@
+import queue
+
+# Marks the end of a stream as it flows through the stages
+STOP = None
+
+
+class DropOldestQueue(queue.Queue):
+    """
+    Bounded queue between pipeline stages. When the consumer falls behind,
+    `put_latest` throws away the oldest item rather than blocking the
+    producer, so a slow stage never makes the microphone deaf and never
+    works through a backlog of stale audio.
+    """
+
+    def __init__(self, maxsize, name=""):
+        super().__init__(maxsize)
+        self.name = name
+        self.dropped = 0
+
+    def put_latest(self, item):
+        while True:
+            try:
+                self.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.get_nowait()
+                    self.dropped += 1
+                    print(f"⚠️ {self.name or 'Pipeline'} queue full, dropped stale item")
+                except queue.Empty:
+                    pass
+
+    def put_stop(self):
+        """
+        Queue the STOP marker past the size limit, so ending the stream
+        never evicts an item that is still waiting.
+        """
+        with self.not_full:
+            self._put(STOP)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+
+class UtteranceQueue(DropOldestQueue):
+    """
+    Audio queue for streaming decoders. Items are runs of ("chunk", samples)
+    each closed by an ("end", ...) or a ("reset", None); every chunk of an
+    utterance has to reach the decoder, so single items are never dropped.
+    Once more than `max_utterances` finished utterances are waiting, the
+    oldest whole run goes instead and a reset takes its place, so the
+    decoder never splices the start of one utterance onto another.
+    """
+
+    def __init__(self, max_utterances, name=""):
+        super().__init__(0, name)
+        self.max_utterances = max_utterances
+
+    def put_latest(self, item):
+        with self.not_full:
+            self._put(item)
+            self.unfinished_tasks += 1
+            if item[0] == "end":
+                while self.waiting_utterances() > self.max_utterances:
+                    self.drop_oldest_run()
+            self.not_empty.notify()
+
+    def put(self, item, block=True, timeout=None):
+        """
+        For sources that can wait: an "end" is held back until fewer than
+        `max_utterances` finished utterances are waiting (queue.Full after
+        `timeout`), so nothing has to be dropped.
+        """
+        with self.not_full:
+            if item[0] == "end" and not self.not_full.wait_for(
+                    lambda: self.waiting_utterances() < self.max_utterances, timeout if block else 0):
+                raise queue.Full
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def waiting_utterances(self):
+        return sum(1 for item in self.queue if item is not STOP and item[0] == "end")
+
+    def drop_oldest_run(self):
+        """
+        Remove everything up to and including the oldest "end" (resets and
+        runs dropped as too short before it go too) and leave a reset in
+        its place, in case the decoder already holds part of that run.
+        """
+        removed = 0
+        while True:
+            item = self.queue.popleft()
+            removed += 1
+            if item[0] == "end":
+                break
+        self.queue.appendleft(("reset", None))
+        self.unfinished_tasks -= removed - 1
+        self.dropped += 1
+        print(f"⚠️ {self.name or 'Pipeline'} queue full, dropped stale utterance")
@@ -0,0 +1,232 @@
+"""
+Run a recognizer backend in its own process, so decoding never holds the
+GIL the Qt event loop, the hotkey thread and pyautogui need.
+
+Audio goes to the worker through a shared-memory block (only the block name
+and sample count cross the pipe). Normalisation, grammar parsing and the
+fuzzy matcher run over there as well, so what comes back is just the heard
+text and the parsed command. A worker that crashes or exits is started again
+on the next utterance, up to MAX_RESTARTS times a minute; after that the
+recognizer is marked failed.
+"""
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import NamedTuple
+import numpy as np
+
+from audio_capture import SAMPLE_RATE
+from recognizers import Recognizer, Hypothesis, create_recognizer
+
+# Room for this many seconds of float32 audio before the block is regrown
+BLOCK_SECONDS = 10
+
+# Give up after this many restarts within RESTART_WINDOW_S seconds
+MAX_RESTARTS = 3
+RESTART_WINDOW_S = 60
+
+# How often a waiting request checks that the worker is still alive
+POLL_S = 0.5
+
+
+class Parsed(NamedTuple):
+    """
+    What the worker returns for an utterance: the best hypothesis' text and
+    the command chosen from the whole n-best list (None if none is valid).
+    """
+    text: str
+    command: object
+
+
+def attach(name):
+    """
+    Open the parent's shared-memory block. The parent owns it, so where
+    Python allows it the worker opts out of tracking; older versions share
+    the parent's resource tracker, which already knows the block.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+
+def serve(conn, backend, phrases, options, macros, fuzzy_threshold):
+    """
+    Worker process body: load the backend and the command matcher, then
+    answer (kind, block name, sample count) requests until None arrives.
+    "command" requests get a Parsed tuple (None when nothing was heard),
+    "hypotheses" requests the raw (text, confidence) list.
+    """
+    # Imported here: the parent only needs them when it parses itself
+    from commands import GRAMMAR
+    from matcher import CommandMatcher
+    from voice_control import recognize, best_command
+
+    recognizer = create_recognizer(backend, phrases=phrases, **options)
+    try:
+        recognizer.load()
+    except Exception as e:
+        conn.send(("error", f"could not load {backend}: {e}"))
+        return
+    GRAMMAR.add_macros(macros)
+    matcher = CommandMatcher(GRAMMAR, threshold=fuzzy_threshold)
+    conn.send(("ready", None))
+
+    blocks = {}
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        kind, name, count = request
+        try:
+            if name not in blocks:
+                blocks[name] = attach(name)
+            audio = np.ndarray((count,), dtype=np.float32, buffer=blocks[name].buf)
+            if kind == "command":
+                hypotheses = recognize(recognizer, audio)
+                result = (hypotheses[0].text, best_command(hypotheses, matcher)) if hypotheses else None
+            else:
+                result = [tuple(h) for h in recognizer.recognize(audio)]
+            del audio  # release the view before the block can be closed
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+    for block in blocks.values():
+        block.close()
+
+
+class ProcessRecognizer(Recognizer):
+    """
+    Recognizer that forwards every utterance to `backend` running in a
+    worker process. load() starts the worker and waits for its model (the
+    warm-up decode happens over there); close() shuts it down.
+    recognize_command() also has the worker parse the result with the
+    grammar (plus `macros`) and the fuzzy matcher.
+    """
+    parses_commands = True
+
+    def __init__(self, backend, phrases=(), macros=None, fuzzy_threshold=85, **options):
+        self.backend = backend
+        self.name = f"{backend} (worker process)"
+        self.phrases = list(phrases)
+        self.macros = dict(macros or {})
+        self.fuzzy_threshold = fuzzy_threshold
+        self.options = options
+        # spawn: a forked child would inherit Qt and audio threads
+        self.context = multiprocessing.get_context("spawn")
+        self.process = None
+        self.conn = None
+        self.block = None
+        self.restarts = []  # monotonic times of recent restarts
+
+    def load(self):
+        self.load_model()
+
+    def load_model(self):
+        self.conn, child = self.context.Pipe()
+        self.process = self.context.Process(target=serve, name="RecognizerWorker", daemon=True,
+                                            args=(child, self.backend, self.phrases, self.options,
+                                                  self.macros, self.fuzzy_threshold))
+        self.process.start()
+        child.close()
+        status, detail = self.receive(timeout=None)
+        if status != "ready":
+            self.stop_worker()
+            raise RuntimeError(detail)
+
+    def receive(self, timeout=None):
+        """
+        Next message from the worker. Raises EOFError if the worker dies
+        while we wait, or TimeoutError after `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.conn.poll(POLL_S):
+            if not self.process.is_alive():
+                raise EOFError(f"worker exited with code {self.process.exitcode}")
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("worker did not answer")
+        return self.conn.recv()
+
+    def share(self, audio):
+        """
+        Copy audio into the shared block, growing it if needed.
+        """
+        count = len(audio)
+        if self.block is None or self.block.size < count * 4:
+            if self.block is not None:
+                self.block.close()
+                self.block.unlink()
+            size = max(count, SAMPLE_RATE * BLOCK_SECONDS) * 4
+            self.block = shared_memory.SharedMemory(create=True, size=size)
+        view = np.ndarray((count,), dtype=np.float32, buffer=self.block.buf)
+        view[:] = audio
+        del view
+        return self.block.name, count
+
+    def request(self, kind, audio):
+        """
+        One utterance through the worker; None if it failed there.
+        """
+        if self.failed:
+            raise RuntimeError("recognizer worker has failed")
+        name, count = self.share(np.asarray(audio, dtype=np.float32))
+        try:
+            self.conn.send((kind, name, count))
+            status, result = self.receive()
+        except (EOFError, OSError) as e:
+            print(f"💥 Recognizer worker died ({str(e) or 'connection closed'}), restarting")
+            self.restart()
+            return None
+        if status != "ok":
+            print(f"🎤 Recognizer worker error: {result}")
+            return None
+        return result
+
+    def recognize(self, audio) -> list:
+        result = self.request("hypotheses", audio)
+        return [Hypothesis(text, confidence) for text, confidence in result or []]
+
+    def recognize_command(self, audio):
+        """
+        Parsed text and command for one utterance, or None if nothing
+        usable was heard.
+        """
+        result = self.request("command", audio)
+        return Parsed(*result) if result else None
+
+    def restart(self):
+        now = time.monotonic()
+        self.restarts = [t for t in self.restarts if now - t < RESTART_WINDOW_S] + [now]
+        if len(self.restarts) > MAX_RESTARTS:
+            self.failed = True
+            self.stop_worker()
+            raise RuntimeError(f"recognizer worker crashed {len(self.restarts)} times in "
+                               f"{RESTART_WINDOW_S} s, giving up")
+        self.stop_worker()
+        self.load_model()
+        print("✅ Recognizer worker restarted")
+
+    def stop_worker(self):
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+
+    def close(self):
+        self.stop_worker()
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
@@ -0,0 +1,272 @@
+import os
+import json
+import math
+from typing import NamedTuple
+import numpy as np
+
+from audio_capture import SAMPLE_RATE
+
+VOSK_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "models", "vosk-model-small-en-us-0.15")
+
+# Tokens Whisper may emit for one utterance; commands are a few words, and
+# the cap stops a hallucinating decoder early
+WHISPER_MAX_TOKENS = 64
+
+# Results that are almost always noise rather than a command
+FILLER_WORDS = {"uh", "um", "hmm", "the", "it"}
+
+
+def clean_transcript(text):
+    """
+    Filter out short or noisy results. Punctuation is left for
+    normalize_spoken() to strip, so "B12. Double click." still reaches the
+    parser as two commands.
+    """
+    text = text.strip().lower()
+    if len(text.strip(".,!?")) < 2 or not text.isascii() or text.strip(".,!?") in FILLER_WORDS:
+        return ""
+    return text
+
+
+def to_pcm16(audio):
+    """
+    Convert float32 samples in [-1, 1] to little-endian int16 bytes.
+    """
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+
+class Hypothesis(NamedTuple):
+    text: str
+    confidence: float  # 0-1, comparable between hypotheses of one utterance
+
+
+class Recognizer:
+    """
+    Interface VoiceListener talks to. A backend turns one utterance of
+    float32 audio into a ranked list of hypotheses, best first, with
+    lower-case text and a confidence (empty when nothing usable was heard).
+
+    Construction is cheap; the model itself is built by load(), which the
+    listener runs on a background thread so the UI can come up first.
+    """
+    name = "base"
+    # Whether start_stream/accept/finish are available for partial results
+    streaming = False
+    # Set once the backend cannot recover and should not be asked again
+    failed = False
+    # Whether recognize_command() hands back an already parsed command
+    parses_commands = False
+
+    def load(self):
+        """
+        Load the model and run a warm-up decode on a silent buffer, so the
+        first real command does not pay for lazy initialisation.
+        """
+        self.load_model()
+        self.recognize(np.zeros(SAMPLE_RATE // 2, dtype=np.float32))
+
+    def load_model(self):
+        raise NotImplementedError
+
+    def recognize(self, audio) -> list:
+        raise NotImplementedError
+
+    def start_stream(self):
+        """
+        Begin a new utterance for accept()/finish() (streaming backends only).
+        """
+        raise NotImplementedError
+
+    def accept(self, audio) -> str:
+        """
+        Feed the next float32 slice of the current utterance and return the
+        partial transcript so far, in the recognizer's own words.
+        """
+        raise NotImplementedError
+
+    def finish(self) -> list:
+        """
+        Close the current utterance and return its hypotheses.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Release anything held outside this process (worker processes).
+        """
+
+    def transcribe(self, audio) -> str:
+        """
+        Text of the best hypothesis only.
+        """
+        hypotheses = self.recognize(audio)
+        return hypotheses[0].text if hypotheses else ""
+
+
+def ranked(hypotheses):
+    """
+    Drop empty and duplicate texts (keeping the best-scoring copy) and sort
+    best first.
+    """
+    best = {}
+    for h in hypotheses:
+        if h.text and (h.text not in best or h.confidence > best[h.text].confidence):
+            best[h.text] = h
+    return sorted(best.values(), key=lambda h: h.confidence, reverse=True)
+
+
+class WhisperRecognizer(Recognizer):
+    """
+    Open-vocabulary faster-whisper backend.
+
+    faster-whisper's transcribe() only returns the single best beam, so the
+    utterance is decoded with CTranslate2 directly and the `n_best` finished
+    beams come back as alternatives, each scored from its length-normalised
+    log-probability and the no-speech probability. Utterances are short
+    commands, so one 30 s window always holds the whole of one.
+    """
+    name = "whisper"
+
+    def __init__(self, model_size="base", compute_type="int8", device="cpu", cpu_threads=0, beam_size=5,
+                 n_best=5):
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.device = device
+        self.cpu_threads = cpu_threads
+        self.beam_size = beam_size
+        self.n_best = n_best
+        # Tokens every decode must produce before it may end (calibration)
+        self.min_tokens = 0
+        self.model = None
+        self.tokenizer = None
+
+    def load_model(self):
+        from faster_whisper import WhisperModel
+        from faster_whisper.tokenizer import Tokenizer
+        self.model = WhisperModel(self.model_size, compute_type=self.compute_type,
+                                  device=self.device, cpu_threads=self.cpu_threads)
+        self.tokenizer = Tokenizer(self.model.hf_tokenizer, self.model.model.is_multilingual,
+                                   task="transcribe", language="en")
+
+    def recognize(self, audio) -> list:
+        extractor = self.model.feature_extractor
+        features = extractor(np.asarray(audio, dtype=np.float32))[:, :extractor.nb_max_frames]
+        features = np.pad(features, ((0, 0), (0, extractor.nb_max_frames - features.shape[-1])))
+        prompt = list(self.tokenizer.sot_sequence) + [self.tokenizer.no_timestamps]
+        # A beam can only hand back as many hypotheses as it keeps
+        beam_size = max(self.beam_size, 1)
+        result = self.model.model.generate(
+            self.model.encode(features), [prompt], beam_size=beam_size,
+            num_hypotheses=min(self.n_best, beam_size), return_scores=True,
+            return_no_speech_prob=True, min_length=self.min_tokens, max_length=WHISPER_MAX_TOKENS,
+            suppress_blank=True, suppress_tokens=[-1])[0]
+
+        speech = 1.0 - result.no_speech_prob
+        hypotheses = []
+        for tokens, score in zip(result.sequences_ids, result.scores):
+            text = self.tokenizer.decode([t for t in tokens if t < self.tokenizer.eot])
+            hypotheses.append(Hypothesis(clean_transcript(text), math.exp(score) * speech))
+        return ranked(hypotheses)
+
+
+class VoskRecognizer(Recognizer):
+    """
+    Streaming Kaldi backend restricted to a closed phrase list. With a small
+    grammar the decoder only has to choose between VocaGrid commands, which
+    runs faster than real time on a single core. The decoder's n-best list
+    is returned with its scores turned into posteriors.
+    """
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, phrases, model_path=VOSK_MODEL_PATH, rate=SAMPLE_RATE, n_best=5):
+        self.model_path = model_path
+        self.rate = rate
+        self.n_best = n_best
+        self.grammar = json.dumps(sorted(set(phrases)) + ["[unk]"])
+        self.model = None
+        self.recognizer = None
+        self.segments = []  # text the decoder already endpointed internally
+
+    def load_model(self):
+        from vosk import Model, KaldiRecognizer, SetLogLevel
+        SetLogLevel(-1)
+        self.model = Model(self.model_path)
+        self.recognizer = KaldiRecognizer(self.model, self.rate, self.grammar)
+        self.recognizer.SetMaxAlternatives(self.n_best)
+
+    @staticmethod
+    def alternatives(result):
+        """
+        (text, score) pairs from a Vosk result, with or without n-best.
+        """
+        result = json.loads(result)
+        if "alternatives" in result:
+            return [(a["text"], a["confidence"]) for a in result["alternatives"]]
+        return [(result.get("text", ""), 0.0)]
+
+    def accept_waveform(self, pcm: bytes) -> str:
+        """
+        Feed a chunk of int16 audio. Returns the best hypothesis so far.
+        """
+        if self.recognizer.AcceptWaveform(pcm):
+            self.segments.append(self.alternatives(self.recognizer.Result())[0][0])
+            return " ".join(self.segments)
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return " ".join(self.segments + [partial]).strip()
+
+    def final(self) -> list:
+        """
+        Close the current utterance and return its hypotheses. Segments the
+        decoder endpointed earlier contribute their best text as a prefix.
+        Resets the decoder.
+        """
+        alternatives = self.alternatives(self.recognizer.FinalResult())
+        prefix = self.segments
+        self.segments = []
+
+        top = max(score for _, score in alternatives)
+        weights = [math.exp(score - top) for _, score in alternatives]
+        total = sum(weights)
+        hypotheses = []
+        for (text, _), weight in zip(alternatives, weights):
+            text = " ".join(prefix + [text]).replace("[unk]", "")
+            hypotheses.append(Hypothesis(clean_transcript(" ".join(text.split())), weight / total))
+        return ranked(hypotheses)
+
+    def start_stream(self):
+        self.recognizer.Reset()
+        self.segments = []
+
+    def accept(self, audio) -> str:
+        return self.accept_waveform(to_pcm16(audio))
+
+    def finish(self) -> list:
+        return self.final()
+
+    def recognize(self, audio) -> list:
+        self.start_stream()
+        pcm = to_pcm16(audio)
+        step = 8000  # 0.25 s of int16 audio per call
+        for i in range(0, len(pcm), step):
+            self.accept_waveform(pcm[i:i + step])
+        return self.final()
+
+
+RECOGNIZERS = {
+    "whisper": WhisperRecognizer,
+    "vosk": VoskRecognizer,
+}
+
+
+def create_recognizer(name, phrases=(), **options):
+    """
+    Build a backend by name. `phrases` is the closed command vocabulary,
+    used by grammar-constrained backends and ignored by open ones.
+    """
+    if name not in RECOGNIZERS:
+        raise ValueError(f"Unknown recognizer backend: {name}")
+    if name == "vosk":
+        return VoskRecognizer(list(phrases), **options)
+    return RECOGNIZERS[name](**options)
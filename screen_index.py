@@ -0,0 +1,107 @@
+import sys
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QGuiApplication
+
+from grid_geometry import cell_center
+
+# pyautogui addresses physical pixels on Windows and X11, but logical
+# points on macOS
+POINTER_USES_DEVICE_PIXELS = sys.platform != "darwin"
+
+
+class ScreenGrid:
+    """
+    One screen's grid: its logical geometry, device pixel ratio and a
+    precomputed table of cell centres in pointer (pyautogui) coordinates.
+    """
+
+    def __init__(self, screen, columns, rows):
+        geometry = screen.geometry()
+        self.name = screen.name()
+        self.left = geometry.x()
+        self.top = geometry.y()
+        self.width = geometry.width()
+        self.height = geometry.height()
+        self.scale = screen.devicePixelRatio() if POINTER_USES_DEVICE_PIXELS else 1.0
+
+        region = (0, 0, self.width, self.height)
+        self.points = [
+            [self.to_pointer(*cell_center(col, row, region, columns, rows)) for row in range(rows)]
+            for col in range(columns)
+        ]
+
+    def to_pointer(self, x, y):
+        """
+        Map a logical point, relative to this screen's top-left, to pointer
+        coordinates. Qt keeps every screen's origin unscaled and scales only
+        the offset inside it, which is what makes mixed-DPI layouts line up.
+        """
+        return int(self.left + x * self.scale), int(self.top + y * self.scale)
+
+
+class ScreenGridIndex(QObject):
+    """
+    Cell → pointer-position tables for every attached screen, built once and
+    rebuilt only when Qt reports a screen being added, removed, moved,
+    resized or rescaled. Looking a cell up is a plain table read.
+    """
+    changed = pyqtSignal()
+
+    def __init__(self, columns, rows):
+        super().__init__()
+        self.columns = columns
+        self.rows = rows
+        self.grids = []
+
+        app = QGuiApplication.instance()
+        for screen in QGuiApplication.screens():
+            self.watch(screen)
+        app.screenAdded.connect(self.screen_added)
+        app.screenRemoved.connect(self.rebuild)
+        app.primaryScreenChanged.connect(self.rebuild)
+        self.rebuild()
+
+    def watch(self, screen):
+        screen.geometryChanged.connect(self.rebuild)
+        screen.logicalDotsPerInchChanged.connect(self.rebuild)
+
+    def screen_added(self, screen):
+        # Each QScreen is announced once, so it is connected exactly once
+        self.watch(screen)
+        self.rebuild()
+
+    def rebuild(self, *_):
+        screens = QGuiApplication.screens()
+        self.grids = [ScreenGrid(screen, self.columns, self.rows) for screen in screens]
+        print(f"🖥️ Grid index built for {len(self.grids)} screen(s): " +
+              ", ".join(f"{g.name} {g.width}x{g.height}@{g.scale:g}x" for g in self.grids))
+        self.changed.emit()
+
+    def screen_number(self, screen):
+        """
+        Position of a QScreen in the index (0 if it is not known).
+        """
+        for number, s in enumerate(QGuiApplication.screens()):
+            if s is screen:
+                return number
+        return 0
+
+    def point(self, screen_number, col, row):
+        """
+        Pointer coordinates of a top-level cell centre (0-based indices).
+        """
+        return self.grids[screen_number].points[col][row]
+
+    def to_pointer(self, screen_number, x, y):
+        """
+        Pointer coordinates of a logical point inside a screen, for targets
+        that are not in the table (zoomed sub-grid cells).
+        """
+        return self.grids[screen_number].to_pointer(x, y)
+
+    def scale(self, screen_number):
+        """
+        Pointer pixels per logical point on a screen.
+        """
+        return self.grids[screen_number].scale
@@ -0,0 +1,127 @@
+import json
+import threading
+
+from recognizers import VOSK_MODEL_PATH
+
+# Audio fed to the spotter per step; smaller reacts sooner but costs more CPU
+SPOT_FRAME_MS = 50
+
+# Vosk models by path, shared by every spotter in the process
+models = {}
+models_lock = threading.Lock()
+
+
+def shared_model(path):
+    """
+    The Vosk Model at `path`, loaded on first use. Spotters only differ in
+    their grammar, so one copy of the model serves all of them.
+    """
+    with models_lock:
+        if path not in models:
+            from vosk import Model
+            models[path] = Model(path)
+        return models[path]
+
+
+class KeywordSpotter:
+    """
+    Listens for a few short phrases ("stop", "wake up") with a tiny Vosk
+    grammar, alongside the main recognizer.
+
+    Run as a thread (start()), it reads its own capture reader and fires
+    `on_keyword` as soon as a keyword shows up in a partial result, without
+    waiting for an utterance to be endpointed. It starts paused; resume()
+    begins listening from the live edge of the capture buffer and pause()
+    makes it idle again. spot() instead checks one already endpointed
+    utterance. If Vosk or its model is missing it reports once and stays
+    inactive.
+    """
+
+    def __init__(self, capture, keywords, on_keyword=None, model_path=VOSK_MODEL_PATH):
+        self.capture = capture
+        self.keywords = set(keywords)
+        self.on_keyword = on_keyword
+        self.model_path = model_path
+        self.frame = int(capture.rate * SPOT_FRAME_MS / 1000)
+        self.active = threading.Event()
+        self.stopped = False
+        self.thread = None
+        self.recognizer = None
+        self.failed = False
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def resume(self):
+        self.active.set()
+
+    def pause(self):
+        self.active.clear()
+
+    def stop(self):
+        self.stopped = True
+        self.active.set()
+
+    def load(self):
+        """
+        Build the Vosk recognizer once; False if it cannot be.
+        """
+        if self.recognizer is None and not self.failed:
+            try:
+                from vosk import KaldiRecognizer, SetLogLevel
+                SetLogLevel(-1)
+                self.recognizer = KaldiRecognizer(shared_model(self.model_path), self.capture.rate,
+                                                  json.dumps(sorted(self.keywords) + ["[unk]"]))
+            except Exception as e:
+                print(f"⚠️ Keyword spotter unavailable: {e}")
+                self.failed = True
+        return self.recognizer is not None
+
+    def heard(self, text):
+        """
+        The keyword contained in recognizer text, if any.
+        """
+        padded = f" {text} "
+        for keyword in self.keywords:
+            if f" {keyword} " in padded:
+                return keyword
+        return None
+
+    def spot(self, pcm: bytes):
+        """
+        Keyword in one whole utterance of int16 audio, or None.
+        """
+        if not self.load():
+            return None
+        self.recognizer.Reset()
+        self.recognizer.AcceptWaveform(pcm)
+        return self.heard(json.loads(self.recognizer.FinalResult()).get("text", ""))
+
+    def run(self):
+        if not self.load():
+            return
+        recognizer = self.recognizer
+
+        while not self.stopped:
+            self.active.wait()
+            if self.stopped:
+                break
+            # Only what is said from now on counts
+            reader = self.capture.reader(from_start=False)
+            recognizer.Reset()
+            while self.active.is_set() and not self.stopped:
+                frame = reader.read(self.frame, timeout=0.5)
+                if frame is None:
+                    if reader.buffer.closed:
+                        return
+                    continue
+                if recognizer.AcceptWaveform(frame.tobytes()):
+                    text = json.loads(recognizer.Result()).get("text", "")
+                else:
+                    text = json.loads(recognizer.PartialResult()).get("partial", "")
+                keyword = self.heard(text)
+                if keyword:
+                    recognizer.Reset()
+                    self.on_keyword(keyword)
@@ -10,6 +10,14 @@ phonetic_map = {
     'uniform': 'u', 'victor': 'v', 'whiskey': 'w', 'xray': 'x', 'yankee': 'y', 'zulu': 'z'
 }
 
+# How letters sound when spelled out, for matching near-misses like "bee"
+letter_names = {
+    'a': 'ay', 'b': 'bee', 'c': 'see', 'd': 'dee', 'e': 'ee', 'f': 'ef', 'g': 'gee',
+    'h': 'aitch', 'i': 'eye', 'j': 'jay', 'k': 'kay', 'l': 'el', 'm': 'em', 'n': 'en',
+    'o': 'oh', 'p': 'pee', 'q': 'cue', 'r': 'are', 's': 'es', 't': 'tee', 'u': 'you',
+    'v': 'vee', 'w': 'double you', 'x': 'ex', 'y': 'why', 'z': 'zee'
+}
+
 # Spoken word numbers
 word_to_number = {
     "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
@@ -59,33 +67,83 @@ def clean_command(text):
     text = re.sub(r"\bcomputer\b", "", text)
     return text
 
-def match_command(cleaned_text, valid_commands):
+def match_command(cleaned_text, valid_commands, score_cutoff=80):
     """
-    Use fuzzy matching to find the closest valid command.
+    Use fuzzy matching to find the closest valid command, or None if nothing
+    scores at least `score_cutoff`. For repeated matching against the full
+    command set, use matcher.CommandMatcher, which indexes it once.
     """
-    match, score, _ = process.extractOne(cleaned_text, valid_commands)
-    return match
+    result = process.extractOne(cleaned_text, valid_commands, score_cutoff=score_cutoff)
+    return result[0] if result else None
 
-def parse_drag_or_diagonal(text):
-    # Hold-to-drag
-    if "hold" in text and "drag" in text:
-        return "hold_drag"
-    if "release" in text:
-        return "release_drag"
+def number_to_words(n):
+    """
+    Spell out an integer below 1000 the way it is spoken (55 -> "fifty five").
+    """
+    ones = {v: k for k, v in word_to_number.items() if v < 20}
+    tens = {v: k for k, v in word_to_number.items() if 20 <= v < 100}
+    words = []
+    if n >= 100:
+        words += [ones[n // 100], "hundred"]
+        n %= 100
+    if n >= 20:
+        words.append(tens[n - n % 10])
+        n %= 10
+    if n:
+        words.append(ones[n])
+    return " ".join(words) if words else "zero"
 
-    # Normalize text
-    text = text.lower()
+def spoken_number(words):
+    """
+    Value of a run of number words, or None if the run is not one number.
+    Digit-by-digit runs concatenate ("one two" -> 12); otherwise the run
+    must read as [units] hundred [tens] [units] ("hundred" alone is 100,
+    "two hundred fifty" is 250). Anything else, e.g. "twelve five", is
+    ambiguous and left alone.
+    """
+    values = [word_to_number[w] for w in words]
+    if len(values) > 1 and all(v < 10 for v in values):
+        return int("".join(str(v) for v in values))
+    if "thousand" in words:
+        return None
+
+    total = 0
+    rest = values
+    if "hundred" in words:
+        at = words.index("hundred")
+        before, rest = values[:at], values[at + 1:]
+        if len(before) > 1 or (before and before[0] >= 10):
+            return None
+        total = (before[0] if before else 1) * 100
+    if len(rest) == 1 and rest[0] < 100:
+        return total + rest[0]
+    if len(rest) == 2 and rest[0] >= 20 and rest[0] < 100 and rest[1] < 10:
+        return total + rest[0] + rest[1]
+    return total if not rest and total else None
+
+def normalize_spoken(text):
+    """
+    Token-level cleanup shared by every recognizer: punctuation is dropped,
+    phonetic alphabet words become letters and runs of number words become
+    digits, so "Bravo twelve, double click." and "move right fifty five"
+    read as "b 12 double click" and "move right 55". A number run that does
+    not read as one number keeps its words.
+    """
+    out = []
+    number_run = []
 
-    # Search for diagonal movement like "move up right 30" or "move down left fifty"
-    match = re.search(r"move\s+(up|down)[ -]?(left|right)\s+([a-z0-9 ]+)?", text)
-    if match:
-        vert = match.group(1)
-        horiz = match.group(2)
-        amount_text = match.group(3).strip() if match.group(3) else "50"
-        try:
-            amount = parse_number(amount_text) if not amount_text.isdigit() else int(amount_text)
-        except:
-            amount = 50
-        return f"move_{vert}_{horiz}_{amount}"
+    def flush():
+        value = spoken_number(number_run)
+        out.extend([str(value)] if value is not None else number_run)
+        number_run.clear()
 
-    return None
+    for token in re.sub(r"[^\w\s]", " ", text.lower().replace("-", " ")).split():
+        if token in word_to_number:
+            number_run.append(token)
+            continue
+        if number_run:
+            flush()
+        out.append(phonetic_map.get(token, token))
+    if number_run:
+        flush()
+    return " ".join(out)
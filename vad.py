@@ -0,0 +1,110 @@
+import numpy as np
+
+from audio_capture import SAMPLE_RATE
+
+
+def frame_energy_db(frame: np.ndarray) -> float:
+    """
+    RMS level of an int16 frame in dBFS (0 dB = full scale).
+    """
+    if len(frame) == 0:
+        return -100.0
+    rms = np.sqrt(np.mean(np.square(frame, dtype=np.float64))) / 32768.0
+    return 20 * np.log10(max(rms, 1e-5))
+
+
+class Endpointer:
+    """
+    Energy-based voice activity detector with utterance endpointing.
+
+    Frames are compared against an adaptive noise floor. An utterance opens
+    after `start_frames` consecutive speech frames and closes as soon as
+    `end_silence_ms` of trailing silence is seen (or `max_utterance_s` is
+    reached), so only the speech span plus a little padding reaches the
+    recognizer.
+    """
+
+    def __init__(self, rate=SAMPLE_RATE, frame_ms=30, threshold_db=12.0, min_speech_db=-50.0,
+                 start_frames=3, end_silence_ms=400, pre_roll_ms=300, post_roll_ms=150,
+                 min_utterance_ms=250, max_utterance_s=6.0):
+        self.rate = rate
+        self.frame = int(rate * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.min_speech_db = min_speech_db
+        self.start_frames = start_frames
+        self.end_silence_frames = max(1, int(end_silence_ms / frame_ms))
+        self.pre_roll = int(rate * pre_roll_ms / 1000)
+        self.post_roll = int(rate * post_roll_ms / 1000)
+        self.min_utterance = int(rate * min_utterance_ms / 1000)
+        self.max_utterance = int(rate * max_utterance_s)
+        self.noise_floor_db = None
+        # (start, end) sample indices of the last utterance returned
+        self.last_span = None
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        energy = frame_energy_db(frame)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = energy
+        speech = energy > max(self.noise_floor_db + self.threshold_db, self.min_speech_db)
+
+        # Floor follows quiet frames down quickly and creeps up slowly, so a
+        # fan switching on is absorbed without swallowing speech onsets.
+        rate = 0.2 if energy < self.noise_floor_db else (0.002 if speech else 0.02)
+        self.noise_floor_db += rate * (energy - self.noise_floor_db)
+        return speech
+
+    def next_utterance(self, reader, on_audio=None):
+        """
+        Consume frames from a CaptureReader until one utterance has been
+        endpointed, and return its int16 samples (None once capture closes).
+        Pre-roll is read back out of the ring buffer, so the soft onset that
+        preceded detection is not clipped.
+
+        `on_audio`, if given, is fed the utterance while it is still being
+        spoken: the pre-roll and opening frames as soon as speech is
+        detected, then every following frame. It is called with None when an
+        opened utterance turns out to be too short and is dropped.
+        """
+        run = 0
+        onset = start = None
+        last_speech_end = None
+        silence = 0
+
+        while True:
+            frame = reader.read(self.frame)
+            if frame is None:
+                return None
+            speech = self.is_speech(frame)
+            frame_end = reader.cursor
+
+            if start is None:
+                run = run + 1 if speech else 0
+                if run >= self.start_frames:
+                    onset = frame_end - run * self.frame
+                    start = max(onset - self.pre_roll, reader.buffer.oldest)
+                    last_speech_end = frame_end
+                    silence = 0
+                    if on_audio:
+                        on_audio(reader.buffer.read(start, frame_end - start))
+                continue
+
+            if on_audio:
+                on_audio(frame)
+
+            if speech:
+                last_speech_end = frame_end
+                silence = 0
+            else:
+                silence += 1
+
+            too_long = frame_end - start >= self.max_utterance
+            if silence >= self.end_silence_frames or too_long:
+                end = min(last_speech_end + self.post_roll, frame_end)
+                if last_speech_end - onset < self.min_utterance:
+                    # A click or a cough: drop it and keep listening
+                    run, onset, start = 0, None, None
+                    if on_audio:
+                        on_audio(None)
+                    continue
+                self.last_span = (start, end)
+                return reader.buffer.read(start, end - start)
@@ -1,159 +1,508 @@
-import pyaudio
+import os
+import time
 import wave
 import queue
 import threading
-import re
-import time
-from faster_whisper import WhisperModel
+import numpy as np
 
-from utils import clean_command, parse_drag_or_diagonal
+from utils import normalize_spoken
+from commands import GRAMMAR, Sequence
+from matcher import CommandMatcher
+from audio_capture import AudioCapture, SAMPLE_RATE, CHANNELS, SAMPLE_WIDTH
+from vad import Endpointer
+from recognizers import create_recognizer, to_pcm16
+from recognizer_process import ProcessRecognizer, Parsed
+from autotune import AutoTuner
+from spotter import KeywordSpotter
+from config import load_config, recognizer_options
+from pipeline import DropOldestQueue, UtteranceQueue, STOP
+from metrics import Metrics, Trace
 
 # Global command queue
 COMMAND_QUEUE = queue.Queue()
 
-# Valid grid commands a1–z30
-valid_commands = [f"{chr(c)}{r}" for c in range(ord("a"), ord("z")+1) for r in range(1,31)]
-
-# Click, theme, and mouse action mappings
-click_commands = {
-    "left click": "left_click",
-    "right click": "right_click",
-    "double click": "double_click"
-}
-
-theme_commands = {
-    "default theme": "theme_default",
-    "high contrast": "theme_high_contrast",
-    "blue light": "theme_blue_light"
-}
-
-mouse_actions = {
-    "scroll up": "scroll_up",
-    "scroll down": "scroll_down",
-    "start drag": "start_drag",
-    "drop here": "drop_here"
-}
-
-# Initialize Whisper model on CPU
-model = WhisperModel("base", compute_type="int8", device="cpu")
-
-def record_audio(filename="temp.wav", duration=3):
-    FORMAT = pyaudio.paInt16
-    CHANNELS = 1
-    RATE = 16000
-    CHUNK = 1024
-
-    audio = pyaudio.PyAudio()
-    stream = audio.open(format=FORMAT, channels=CHANNELS,
-                        rate=RATE, input=True,
-                        frames_per_buffer=CHUNK)
-
-    frames = []
-    for _ in range(int(RATE / CHUNK * duration)):
-        frames.append(stream.read(CHUNK))
-
-    stream.stop_stream()
-    stream.close()
-    audio.terminate()
+# Discount applied to hypotheses that only match a command fuzzily
+FUZZY_WEIGHT = 0.8
+
+
+def record_audio(reader, endpointer, on_audio=None):
+    """
+    Wait for the next endpointed utterance on a capture reader and return
+    just its speech span as float32 samples in [-1, 1], the format
+    faster-whisper consumes directly. Silence never reaches the model.
+    `on_audio` receives the int16 samples while they are spoken (see
+    Endpointer.next_utterance).
+    """
+    samples = endpointer.next_utterance(reader, on_audio)
+    if samples is None:
+        return None
+    return samples.astype(np.float32) / 32768.0
 
+
+def write_wav(filename, audio):
+    """
+    Debug/recording sink: dump float32 samples to a 16-bit mono WAV file.
+    """
     with wave.open(filename, 'wb') as wf:
         wf.setnchannels(CHANNELS)
-        wf.setsampwidth(audio.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(frames))
-
+        wf.setsampwidth(SAMPLE_WIDTH)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(to_pcm16(audio))
     return filename
 
 
-def transcribe(filename="temp.wav"):
-    segments, _ = model.transcribe(filename)
-    for segment in segments:
-        text = segment.text.strip().lower()
-        # Filter out short or noisy results
-        if len(text) < 2 or not text.isascii() or text in {"uh","um","hmm","the","it"}:
-            return ""
-        # Keep only first sentence/clause
-        if "." in text:
-            text = text.split(".")[0].strip()
-        return text
-    return ""
-
-
-def extract_amount(text: str) -> str | None:
-    match = re.match(r"move (right|left|up|down)( .+)?", text)
-    if match:
-        direction = match.group(1)
-        raw = match.group(2).strip() if match.group(2) else ""
-        # Extract digits only
-        digits = re.sub(r"\D", "", raw)
-        try:
-            amount = int(digits) if digits else 50
-        except ValueError:
-            amount = 50
-        return f"move_{direction}_{amount}"
+def recognize(recognizer, audio):
+    """
+    Run one utterance through a recognizer and normalize every hypothesis
+    (phonetic words → letters, number words → digits).
+    """
+    return [h._replace(text=normalize_spoken(h.text)) for h in recognizer.recognize(audio)]
+
+
+def steps(command):
+    return command.commands if isinstance(command, Sequence) else (command,)
+
+
+def extends(longer, shorter):
+    """
+    Whether `longer` runs all of `shorter` first and then more commands.
+    """
+    head = steps(shorter)
+    return len(steps(longer)) > len(head) and steps(longer)[:len(head)] == head
+
+
+def best_command(hypotheses, matcher=None):
+    """
+    Rescore a recognizer's n-best list against the grammar and return the
+    command from the best *valid* hypothesis. An exact grammar parse keeps
+    the hypothesis' confidence; a fuzzy match is discounted by its match
+    score, so a slightly less likely exact command ("b 12") beats a more
+    likely near-miss ("be 12").
+    """
+    scored = []
+    unparsed = []
+    for h in hypotheses:
+        command = GRAMMAR.parse(h.text)
+        if command is not None:
+            scored.append((h.confidence, command, h.text))
+        else:
+            unparsed.append(h)
+
+    if matcher is not None and unparsed:
+        # One batched scoring call for every hypothesis the grammar rejected
+        for h, (command, score) in zip(unparsed, matcher.match_many([h.text for h in unparsed])):
+            if command is not None:
+                scored.append((h.confidence * FUZZY_WEIGHT * score / 100, command, h.text))
+
+    if not scored:
+        print(f"❌ Ignored non-command: {hypotheses[0].text if hypotheses else ''}")
+        return None
+    # "b12" next to "b12 double click" is the same transcript cut short, not
+    # a rival reading; scored per token it would usually win and silently
+    # drop the click, so a prefix never competes with its own extension
+    scored = [s for s in scored if not any(extends(other[1], s[1]) for other in scored)]
+    confidence, command, text = max(scored, key=lambda s: s[0])
+    print(f"✅ Matched command: {command} from '{text}' ({confidence:.2f})")
+    return command
+
+
+def remaining_after(early, command):
+    """
+    What is still to do once `early` was dispatched from a partial result:
+    nothing if the final result is the same command, the tail of a Sequence
+    that starts with it, and nothing (with a warning) if the final result
+    disagrees, rather than acting twice.
+    """
+    if command is None or command == early:
+        return None
+    if isinstance(command, Sequence) and command.commands[0] == early:
+        rest = command.commands[1:]
+        return rest[0] if len(rest) == 1 else Sequence(rest)
+    print(f"⚠️ Final result {command} disagrees with early command {early}, ignored")
     return None
 
 
+class PartialTracker:
+    """
+    Follows the partial transcripts of one streaming utterance and decides
+    when a command is safe to dispatch before the speaker has finished: the
+    partial must have stayed unchanged for `stable_ms` of audio and name
+    exactly one command however the phrase might continue. Fires at most
+    once per utterance.
+    """
+
+    def __init__(self, grammar, rate=SAMPLE_RATE, stable_ms=150):
+        self.grammar = grammar
+        self.stable = int(rate * stable_ms / 1000)
+        self.reset()
+
+    def reset(self):
+        self.text = ""
+        self.held = 0  # samples of audio the current partial has survived
+        self.fired = None
+
+    def update(self, partial, samples):
+        """
+        Feed the partial transcript after `samples` more audio. Returns a
+        command the one time it should be dispatched, otherwise None.
+        """
+        if self.fired is not None:
+            return None
+        partial = " ".join(partial.replace("[unk]", "").lower().split())
+        if partial != self.text:
+            self.text, self.held = partial, 0
+            return None
+        self.held += samples
+        if not partial or self.held < self.stable:
+            return None
+        self.fired = self.grammar.early_command(partial)
+        return self.fired
+
+
 class VoiceListener:
-    def __init__(self):
+    """
+    Runs capture, recognition and command parsing as three workers joined by
+    small drop-oldest queues. The microphone keeps being endpointed while an
+    earlier utterance is decoding, and throughput is set by the slowest stage
+    rather than the sum of all of them.
+    """
+
+    def __init__(self, record_dir=None, config=None, on_state=None, on_command=None, capture=None):
         self.running = True
+        self.config = config or load_config()
+        # Where parsed commands go, as on_command(command, trace). The
+        # receiver marks the trace's later spans and hands it to
+        # self.metrics.record(); the default sink is the shared COMMAND_QUEUE.
+        self.on_command = on_command or self.queue_command
+        # Per-stage latency histograms, plus an optional JSONL trace file
+        self.metrics = Metrics(trace_path=self.config["trace_path"])
+        # Called with "loading", "listening", "error" or "off"
+        self.on_state = on_state
+        self.state = "loading"
+        # The microphone stays open for the listener's whole life; each cycle
+        # only pulls the next slice out of the capture ring buffer. Any
+        # object with the same start/stop/reader interface (StreamCapture)
+        # can stand in for it.
+        self.capture = capture or AudioCapture()
+        # Only speech spans are passed on to the recognizer
+        self.endpointer = Endpointer()
+        # User macros become grammar phrases before anything reads the grammar
+        GRAMMAR.add_macros(self.config["macros"])
+        # Cheap to build; the model is loaded by the decode worker
+        backend = self.config["backend"]
+        # Whisper settings measured for this machine (calibrated on first load)
+        self.tuner = None
+        if self.config["auto_tune"] and backend == "whisper":
+            self.tuner = AutoTuner(self.config)
+            self.config.update(self.tuner.settings)
+        self.recognizer = self.build_recognizer()
+        # Near-miss fallback over every spoken variant of every command; a
+        # worker process does its own matching
+        self.matcher = None
+        if not self.recognizer.parses_commands:
+            self.matcher = CommandMatcher(GRAMMAR, threshold=self.config["fuzzy_threshold"])
+        # Streaming backends can dispatch a command from a stable partial
+        # result, before the utterance's tail and endpoint silence are in
+        self.streaming = self.config["early_dispatch"] and self.recognizer.streaming
+        if self.config["early_dispatch"] and not self.streaming:
+            print(f"⚠️ {backend} recognizer has no partial results, early dispatch is off")
+        self.partials = PartialTracker(GRAMMAR, stable_ms=self.config["partial_stable_ms"])
+        self.stream_trace = None  # trace of the utterance being streamed
+        # Low-power idle: after idle_timeout_s without a command, utterances
+        # only go to a tiny wake-phrase spotter until the phrase is heard
+        self.wake_spotter = None
+        if self.config["idle_mode"]:
+            self.wake_spotter = KeywordSpotter(self.capture, [self.config["wake_phrase"].lower()])
+        self.last_activity = time.monotonic()
+        # Optional directory that every captured utterance is dumped into
+        self.record_dir = record_dir or self.config["record_dir"]
+        self.recorded = 0
+
+        # When streaming, every frame of an utterance has to reach the
+        # decoder, so a backlog is cut by whole utterances instead
+        self.audio_queue = (UtteranceQueue(2, name="Audio") if self.streaming
+                            else DropOldestQueue(2, name="Audio"))
+        self.text_queue = DropOldestQueue(4, name="Text")
 
     def listen(self):
+        """
+        Blocking entry point: starts the decode and parse workers and runs the
+        capture stage on the calling thread until stop() is called.
+        """
+        self.capture.start()
+        workers = [threading.Thread(target=self.decode_loop, daemon=True),
+                   threading.Thread(target=self.parse_loop, daemon=True)]
+        for worker in workers:
+            worker.start()
+        if self.wake_spotter:
+            threading.Thread(target=self.idle_loop, daemon=True).start()
+        self.capture_loop()
+        # Capture has ended: let the utterances already in flight finish
+        for worker in workers:
+            worker.join()
+
+    def capture_loop(self):
+        reader = self.capture.reader()
+        on_audio = self.stream_audio if self.streaming else None
         while self.running:
             try:
-                filename = record_audio()
-                text = transcribe(filename)
-                if not text:
+                streamed = None if self.state == "idle" else on_audio
+                audio = record_audio(reader, self.endpointer, streamed)
+                if audio is None:
+                    break
+                # Idle may have begun while waiting for this utterance, and
+                # then it is most likely the wake phrase
+                if self.state == "idle":
+                    if streamed:
+                        # The decoder already holds the start of it
+                        self.pass_on(self.audio_queue, ("reset", None))
+                    self.check_wake(audio)
                     continue
+                trace = Trace()
+                start, end = self.endpointer.last_span
+                trace.mark("captured", reader.buffer.time_of(start))
+                trace.mark("speech_end", reader.buffer.time_of(end))
+                trace.mark("endpointed")
+                if self.record_dir:
+                    self.save_recording(audio)
+                if self.streaming:
+                    self.pass_on(self.audio_queue, ("end", (audio, trace)))
+                else:
+                    self.pass_on(self.audio_queue, (audio, trace))
+            except Exception as e:
+                print("🎤 VoiceListener capture error:", e)
+        self.audio_queue.put_stop()
 
-                print(f"Heard: {text}")
+    def stream_audio(self, samples):
+        if samples is None:
+            self.pass_on(self.audio_queue, ("reset", None))
+        else:
+            self.pass_on(self.audio_queue, ("chunk", samples))
 
-                # Early command matches
-                if text == "toggle panel":
-                    print("🪟 Voice command: toggle control panel")
-                    COMMAND_QUEUE.put("toggle_panel")
-                    continue
+    def pass_on(self, stage_queue, item):
+        """
+        Hand an item to the next stage. Live audio drops the oldest waiting
+        item when that stage falls behind; a source that can wait (a replay
+        at full speed) is held up instead, so no utterance is lost.
+        """
+        if not self.capture.backpressure:
+            stage_queue.put_latest(item)
+            return
+        while self.running and self.state != "error":
+            try:
+                stage_queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                pass
 
-                if text in theme_commands:
-                    print(f"🎨 Matched theme command: {text}")
-                    COMMAND_QUEUE.put(theme_commands[text])
-                    continue
+    def check_wake(self, audio):
+        if self.wake_spotter.spot(to_pcm16(audio)):
+            print("👋 Wake phrase heard, listening")
+            self.last_activity = time.monotonic()
+            self.set_state("listening")
 
-                if text in click_commands:
-                    print(f"✅ Matched click command: {text}")
-                    COMMAND_QUEUE.put(click_commands[text])
-                    continue
+    def idle_loop(self):
+        """
+        Drop to idle once no command has come through for idle_timeout_s.
+        """
+        timeout = self.config["idle_timeout_s"]
+        while self.running:
+            time.sleep(1)
+            if self.state != "listening" or time.monotonic() - self.last_activity < timeout:
+                continue
+            if not self.wake_spotter.load():
+                print("⚠️ No wake-phrase spotter, idle mode is off")
+                return
+            print(f"💤 No commands for {timeout} s, idle until '{self.config['wake_phrase']}'")
+            self.set_state("idle")
 
-                if text in mouse_actions:
-                    print(f"🖱️ Matched mouse command: {text}")
-                    COMMAND_QUEUE.put(mouse_actions[text])
-                    continue
+    def set_state(self, state):
+        self.state = state
+        if self.on_state:
+            self.on_state(state)
 
-                diag = parse_drag_or_diagonal(text)
-                if diag:
-                    print(f"🧲 Parsed drag/diagonal: {diag}")
-                    COMMAND_QUEUE.put(diag)
-                    continue
+    def build_recognizer(self):
+        backend = self.config["backend"]
+        if self.config["recognizer_process"]:
+            # Decoding and parsing then never compete with the GUI for the GIL
+            return ProcessRecognizer(backend, phrases=GRAMMAR.spoken_phrases(), macros=self.config["macros"],
+                                     fuzzy_threshold=self.config["fuzzy_threshold"],
+                                     **recognizer_options(self.config))
+        return create_recognizer(backend, phrases=GRAMMAR.spoken_phrases(),
+                                 **recognizer_options(self.config))
 
-                move_cmd = extract_amount(text)
-                if move_cmd:
-                    print(f"🖱️ Parsed move command: {move_cmd}")
-                    COMMAND_QUEUE.put(move_cmd)
-                    continue
+    def load_recognizer(self):
+        if self.tuner and not self.tuner.tuned:
+            try:
+                # Candidate models stay out of this process if decoding does
+                self.config.update(self.tuner.calibrate_in_process() if self.config["recognizer_process"]
+                                   else self.tuner.calibrate())
+                self.recognizer = self.build_recognizer()
+            except Exception as e:
+                print("⚠️ Calibration failed, keeping configured settings:", e)
+        print(f"⏳ Loading {self.recognizer.name} recognizer...")
+        try:
+            self.recognizer.load()
+        except Exception as e:
+            print("🎤 VoiceListener could not load recognizer:", e)
+            self.set_state("error")
+            return False
+        # Anything said while the model was loading is stale by now
+        while not self.audio_queue.empty():
+            if self.audio_queue.get_nowait() is STOP:
+                return False
+        print("✅ Recognizer ready")
+        self.last_activity = time.monotonic()
+        self.set_state("listening")
+        return True
+
+    def decode_loop(self):
+        if not self.load_recognizer():
+            self.text_queue.put_stop()
+            return
+        while True:
+            item = self.audio_queue.get()
+            if item is STOP:
+                break
+            try:
+                if self.streaming:
+                    self.decode_stream(*item)
+                else:
+                    audio, trace = item
+                    trace.mark("decode_start")
+                    if self.recognizer.parses_commands:
+                        self.pass_hypotheses(self.recognizer.recognize_command(audio), trace)
+                    else:
+                        self.pass_hypotheses(recognize(self.recognizer, audio), trace)
+                    if self.tuner and not self.retune(trace.marks["decode_end"] - trace.marks["decode_start"]):
+                        break
+            except Exception as e:
+                print("🎤 VoiceListener decode error:", e)
+                if self.recognizer.failed:
+                    # Nothing left to decode with; say so instead of looking healthy
+                    self.set_state("error")
+                    break
+        self.text_queue.put_stop()
+
+    def retune(self, decode_s):
+        """
+        Let the tuner see one decode; swap to lighter settings if it asks.
+        Returns False if the listener was stopped during a model reload.
+        """
+        settings = self.tuner.observe(decode_s, backlog=self.audio_queue.qsize())
+        if settings is None:
+            return True
+        model_changed = settings["whisper_model"] != self.config["whisper_model"]
+        self.config.update(settings)
+        if not model_changed and hasattr(self.recognizer, "beam_size"):
+            self.recognizer.beam_size = settings["beam_size"]
+            return True
+        self.recognizer.close()
+        self.recognizer = self.build_recognizer()
+        self.set_state("loading")
+        return self.load_recognizer()
+
+    def decode_stream(self, kind, payload):
+        """
+        One streaming-mode queue item: a "chunk" of a live utterance, a
+        "reset" for one the endpointer dropped, or the "end" of one.
+        """
+        if kind == "reset":
+            self.stream_trace = None
+            return
+
+        if kind == "chunk":
+            if self.stream_trace is None:
+                self.recognizer.start_stream()
+                self.partials.reset()
+                self.stream_trace = Trace()
+                self.stream_trace.mark("captured")
+            partial = self.recognizer.accept(payload.astype(np.float32) / 32768.0)
+            command = self.partials.update(partial, len(payload))
+            if command is not None:
+                # Its own trace: the utterance is still being spoken
+                trace = self.stream_trace
+                trace.mark("parsed")
+                trace.text = self.partials.text
+                trace.command = command
+                print(f"⚡ Early command from partial '{self.partials.text}': {command}")
+                trace.mark("queued")
+                self.dispatch(command, trace)
+            return
+
+        audio, trace = payload
+        trace.mark("decode_start")
+        if self.stream_trace is None:
+            # Nothing was streamed (e.g. the model was still loading)
+            self.pass_hypotheses(recognize(self.recognizer, audio), trace)
+            return
+        self.stream_trace = None
+        hypotheses = [h._replace(text=normalize_spoken(h.text)) for h in self.recognizer.finish()]
+        self.pass_hypotheses(hypotheses, trace, early=self.partials.fired)
 
-                # Clean for grid matching
-                cleaned = text.replace(" ", "").replace("-", "")
-                if re.match(r"^[a-z]\d{1,2}$", cleaned) and cleaned in valid_commands:
-                    print(f"✅ Matched grid command: {cleaned}")
-                    COMMAND_QUEUE.put(cleaned)
+    def pass_hypotheses(self, hypotheses, trace, early=None):
+        """
+        Hand one decode to the parse stage: an n-best list, or the Parsed
+        result of a worker process that has already matched it.
+        """
+        trace.mark("decode_end")
+        if isinstance(hypotheses, Parsed):
+            print(f"Heard: {hypotheses.text}")
+            self.pass_on(self.text_queue, (hypotheses, trace, early))
+        elif hypotheses:
+            print(f"Heard: {hypotheses[0].text}" +
+                  (f" (+{len(hypotheses) - 1} alternatives)" if len(hypotheses) > 1 else ""))
+            self.pass_on(self.text_queue, (hypotheses, trace, early))
+        elif early is None:
+            self.metrics.record(trace)
+
+    def parse_loop(self):
+        while True:
+            item = self.text_queue.get()
+            if item is STOP:
+                break
+            hypotheses, trace, early = item
+            try:
+                if isinstance(hypotheses, Parsed):
+                    command, text = hypotheses.command, hypotheses.text
                 else:
-                    print(f"❌ Ignored non-command: {text}")
+                    command, text = best_command(hypotheses, self.matcher), hypotheses[0].text
+                trace.mark("parsed")
+                trace.text = text
+                if early is not None:
+                    # Part or all of this was dispatched from a partial
+                    command = remaining_after(early, command)
+                    if command is None:
+                        print(f"⏩ Final result already handled early: {early}")
+                        continue
+                trace.command = command
+                if command is None:
+                    self.metrics.record(trace)
+                    continue
+                trace.mark("queued")
+                self.dispatch(command, trace)
             except Exception as e:
-                print("🎤 VoiceListener error:", e)
-            time.sleep(0.5)
+                print("🎤 VoiceListener parse error:", e)
+
+    def dispatch(self, command, trace):
+        self.last_activity = time.monotonic()
+        self.on_command(command, trace)
+
+    def queue_command(self, command, trace):
+        COMMAND_QUEUE.put(command)
+        self.metrics.record(trace)
+
+    def save_recording(self, audio):
+        os.makedirs(self.record_dir, exist_ok=True)
+        self.recorded += 1
+        write_wav(os.path.join(self.record_dir, f"utterance_{self.recorded:04d}.wav"), audio)
 
     def start(self):
         threading.Thread(target=self.listen, daemon=True).start()
 
     def stop(self):
         self.running = False
+        self.capture.stop()
+        self.recognizer.close()
+        self.metrics.close()
+        self.set_state("off")